@@ -1,14 +1,22 @@
 """
 Backtest October, November, December 2025 separately
 Each with their own news events
+Months are independent, so they run in parallel worker processes
 """
-import pandas as pd
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import sys
 sys.path.insert(0, 'src')
-from strategy import TrendFollowingStrategy
+from strategy import TrendFollowingStrategy, strategy_state
 from backtester import Backtester
+from data_loader import load_candles
+from news_filter import NewsFilter
 from config import *
 
+log = logging.getLogger('backtest')
+
 months = [
     ('September', 'data/raw/EURUSD_M15_2025-09-01_2025-09-30.csv'),
     ('October', 'data/raw/EURUSD_M15_2025-10-01_2025-10-31.csv'),
@@ -16,144 +24,170 @@ months = [
     ('December', 'data/raw/EURUSD_M15_2025-12-05_2026-01-04.csv'),
 ]
 
-print("\n" + "="*80)
-print("BACKTEST: SEPTEMBER, OCTOBER, NOVEMBER, DECEMBER 2025")
-print("="*80)
-
-total_trades = 0
-total_pnl = 0
-month_results = []
-
-for month_name, file_path in months:
-    print(f"\n{'='*80}")
-    print(f"{month_name.upper()} 2025")
-    print(f"{'='*80}")
-
+MONTHS_TO_NUM = {'September': 9, 'October': 10, 'November': 11, 'December': 12}
+
+
+def load_month_news():
+    """
+    Month-specific news for every month, fetched once in the parent process
+    and passed to each run_month call (spawned workers re-import this module,
+    so a module-level fetch would repeat in every worker)
+    """
+    if not ENABLE_NEWS_FILTER:
+        return {}
+
+    from news_events_by_month import get_news_for_month
+    return {month_name: get_news_for_month(2025, MONTHS_TO_NUM[month_name])
+            for month_name, _ in months if month_name in MONTHS_TO_NUM}
+
+
+# Strategy, news filter and backtester reused by every month run in this process
+_worker = {}
+
+
+def _get_worker_objects():
+    """Create this process' strategy, news filter and backtester on first use"""
+    if not _worker:
+        _worker['strategy'] = TrendFollowingStrategy(
+            individual_tp_pips=INDIVIDUAL_TP_PIPS,
+            risk_per_trade=RISK_PER_TRADE,
+            max_stop_loss_percent=MAX_STOP_LOSS_PERCENT,
+            trading_hours=TRADING_HOURS,
+            analysis_hours=ANALYSIS_HOURS,
+            swing_lookback=SWING_LOOKBACK,
+            enable_news_filter=False,  # Disable auto-loading, we'll load manually
+            news_buffer_before=NEWS_BEFORE_MINUTES,
+            news_buffer_after=NEWS_AFTER_MINUTES
+        )
+        _worker['news_filter'] = NewsFilter(NEWS_BEFORE_MINUTES, NEWS_AFTER_MINUTES)
+        _worker['backtester'] = Backtester(INITIAL_BALANCE, "EURUSD")
+
+    return _worker['strategy'], _worker['news_filter'], _worker['backtester']
+
+
+def run_month(month_name, file_path, month_news=None):
+    """
+    Backtest a single month with its own strategy, news events and balance
+    month_news: The month's (datetime, event_name) list from load_month_news
+    Returns a dict of month results (printing is left to the caller)
+    """
     # Load data
-    df = pd.read_csv(file_path)
-    df['time'] = pd.to_datetime(df['time'])
-
-    # Create strategy with month-specific news
-    strategy = TrendFollowingStrategy(
-        individual_tp_pips=INDIVIDUAL_TP_PIPS,
-        risk_per_trade=RISK_PER_TRADE,
-        max_stop_loss_percent=MAX_STOP_LOSS_PERCENT,
-        trading_hours=TRADING_HOURS,
-        analysis_hours=ANALYSIS_HOURS,
-        swing_lookback=SWING_LOOKBACK,
-        enable_news_filter=False,  # Disable auto-loading, we'll load manually
-        news_buffer_before=NEWS_BEFORE_MINUTES,
-        news_buffer_after=NEWS_AFTER_MINUTES
-    )
+    df = load_candles(file_path)
+
+    # Reuse this process' objects (strategy_state starts from a fresh strategy state)
+    strategy, news_filter, backtester = _get_worker_objects()
+    backtester.reset(INITIAL_BALANCE)
 
     # Manually load month-specific news
+    news_count = None
     if ENABLE_NEWS_FILTER:
-        from news_filter import NewsFilter
-        from news_events_by_month import get_news_for_month
-
-        strategy.news_filter = NewsFilter(NEWS_BEFORE_MINUTES, NEWS_AFTER_MINUTES)
+        news_filter.clear_news()
+        strategy.news_filter = news_filter
 
-        # Get month number from month name
-        month_map = {'September': 9, 'October': 10, 'November': 11, 'December': 12}
-        month_num = month_map.get(month_name)
-
-        if month_num:
-            month_news = get_news_for_month(2025, month_num)
+        if month_news is not None:
             strategy.news_filter.load_custom_news(month_news)
-            print(f"Loaded {len(month_news)} news events for {month_name}")
+            news_count = len(month_news)
 
         strategy.enable_news_filter = True
     else:
         strategy.news_filter = None
+        strategy.enable_news_filter = False
 
-    backtester = Backtester(INITIAL_BALANCE, "EURUSD")
-
-    # Run backtest
-    for i in range(0, len(df)):
-        candle = df.iloc[i]
-
-        if strategy.check_daily_reset(candle['time']):
-            if backtester.open_positions:
-                backtester.close_all_positions(candle['time'], candle['close'], 'DAILY_RESET')
-            strategy.reset_daily_state()
-
-        if strategy.should_close_all_positions(candle['time']):
-            if backtester.open_positions:
-                backtester.close_all_positions(candle['time'], candle['close'], 'END_OF_DAY')
-
-        if strategy.enable_news_filter and strategy.news_filter:
-            is_news, event = strategy.news_filter.is_news_time(candle['time'])
-            if is_news and backtester.open_positions:
-                backtester.close_all_positions(candle['time'], candle['close'], f'NEWS_{event}')
+    # Strategy pass: per-candle state for the position kernel (one compiled pass)
+    state = strategy_state(df, strategy)
 
-        strategy.update_swing_levels(df, i)
-        strategy.check_bias_change(df, i)
-
-        # Check if mitigation was tested
-        strategy.check_mitigation_test(candle)
-
-        # Increment entry candle count if ready to trade
-        if strategy.ready_to_trade:
-            strategy.entry_candle_count += 1
-
-        backtester.update_positions(candle, strategy.bias, strategy.mitigation_high, strategy.mitigation_low)
-
-        if strategy.is_trading_hours(candle['time'], df, i) and strategy.should_enter(candle):
-            if MAX_OPEN_POSITIONS is None or len(backtester.open_positions) < MAX_OPEN_POSITIONS:
-                if strategy.mitigation_high is not None and strategy.mitigation_low is not None:
-                    entry_price = strategy.get_entry_price(candle)
-                    lot_size = strategy.calculate_position_size(backtester.balance, entry_price, "EURUSD")
-
-                    if lot_size > 0:
-                        # Get TP based on which entry candle (1st, 2nd, or 3rd)
-                        tp_pips = strategy.get_tp_pips_for_entry_candle()
-
-                        backtester.open_position(
-                            entry_time=candle['time'],
-                            entry_price=entry_price,
-                            direction=strategy.bias,
-                            lot_size=lot_size,
-                            sl_price=strategy.get_sl_price(),
-                            tp_pips=tp_pips,
-                            spread_pips=SPREAD_PIPS
-                        )
+    # Position pass: TP/SL, close-all events, sizing and P&L (JIT-compiled)
+    backtester.simulate(df, state, strategy, spread_pips=SPREAD_PIPS,
+                        max_open_positions=MAX_OPEN_POSITIONS)
 
     # Results
     month_pnl = backtester.balance - INITIAL_BALANCE
     month_return = (month_pnl / INITIAL_BALANCE) * 100
-    wins = len([p for p in backtester.closed_positions if p.pnl > 0])
-    losses = len([p for p in backtester.closed_positions if p.pnl < 0])
+    pnls = np.fromiter((p.pnl for p in backtester.closed_positions), dtype=np.float64,
+                       count=len(backtester.closed_positions))
+    wins = int((pnls > 0).sum())
+    losses = int((pnls < 0).sum())
     win_rate = (wins / len(backtester.closed_positions) * 100) if backtester.closed_positions else 0
 
-    print(f"\nResults:")
-    print(f"  Trades: {len(backtester.closed_positions)}")
-    print(f"  Wins: {wins}, Losses: {losses}")
-    print(f"  Win Rate: {win_rate:.1f}%")
-    print(f"  P&L: ${month_pnl:+,.2f}")
-    print(f"  Return: {month_return:+.2f}%")
-
-    total_trades += len(backtester.closed_positions)
-    total_pnl += month_pnl
-
-    month_results.append({
+    return {
         'month': month_name,
+        'news_count': news_count,
         'trades': len(backtester.closed_positions),
         'wins': wins,
         'losses': losses,
         'win_rate': win_rate,
         'pnl': month_pnl,
         'return': month_return
-    })
-
-# Summary
-print(f"\n{'='*80}")
-print("OVERALL SUMMARY")
-print(f"{'='*80}")
-
-for result in month_results:
-    print(f"\n{result['month']:10s} | {result['trades']:3d} trades | WR: {result['win_rate']:5.1f}% | Return: {result['return']:+6.2f}%")
-
-total_return = (total_pnl / INITIAL_BALANCE) * 100
-print(f"\n{'='*80}")
-print(f"TOTAL: {total_trades} trades | P&L: ${total_pnl:+,.2f} | Return: {total_return:+.2f}%")
-print(f"{'='*80}\n")
+    }
+
+
+def print_month_result(result):
+    """Log the results block for one month"""
+    if not log.isEnabledFor(logging.INFO):
+        return  # Skip building the f-strings under -q
+
+    log.info(f"\n{'='*80}")
+    log.info(f"{result['month'].upper()} 2025")
+    log.info(f"{'='*80}")
+
+    if result['news_count'] is not None:
+        log.info(f"Loaded {result['news_count']} news events for {result['month']}")
+
+    log.info(f"\nResults:")
+    log.info(f"  Trades: {result['trades']}")
+    log.info(f"  Wins: {result['wins']}, Losses: {result['losses']}")
+    log.info(f"  Win Rate: {result['win_rate']:.1f}%")
+    log.info(f"  P&L: ${result['pnl']:+,.2f}")
+    log.info(f"  Return: {result['return']:+.2f}%")
+
+
+def print_summary(month_results, total_trades, total_pnl):
+    """Log the overall summary across months"""
+    if not log.isEnabledFor(logging.INFO):
+        return  # Skip building the f-strings under -q
+
+    log.info(f"\n{'='*80}")
+    log.info("OVERALL SUMMARY")
+    log.info(f"{'='*80}")
+
+    for result in month_results:
+        log.info(f"\n{result['month']:10s} | {result['trades']:3d} trades | WR: {result['win_rate']:5.1f}% | Return: {result['return']:+6.2f}%")
+
+    total_return = (total_pnl / INITIAL_BALANCE) * 100
+    log.info(f"\n{'='*80}")
+    log.info(f"TOTAL: {total_trades} trades | P&L: ${total_pnl:+,.2f} | Return: {total_return:+.2f}%")
+    log.info(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    # -q: only log warnings and errors
+    logging.basicConfig(stream=sys.stdout, format='%(message)s',
+                        level=logging.WARNING if '-q' in sys.argv[1:] else logging.INFO)
+
+    rule = '=' * 80
+    log.info("\n%s", rule)
+    log.info("BACKTEST: SEPTEMBER, OCTOBER, NOVEMBER, DECEMBER 2025")
+    log.info("%s", rule)
+
+    # Each month is an independent backtest - run them concurrently
+    news_by_month = load_month_news()
+    results_by_month = {}
+    max_workers = min(len(months), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_month, month_name, file_path,
+                                   news_by_month.get(month_name)): month_name
+                   for month_name, file_path in months}
+        for future in as_completed(futures):
+            results_by_month[futures[future]] = future.result()
+
+    # Report in calendar order regardless of completion order
+    month_results = [results_by_month[month_name] for month_name, _ in months]
+
+    total_trades = 0
+    total_pnl = 0
+    for result in month_results:
+        print_month_result(result)
+        total_trades += result['trades']
+        total_pnl += result['pnl']
+
+    print_summary(month_results, total_trades, total_pnl)
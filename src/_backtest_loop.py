@@ -0,0 +1,701 @@
+"""
+Numeric backtest kernels (Numba JIT when available)
+
+Pure-array versions of the per-candle hot paths:
+- Swing high/low detection on the high/low columns
+- ADX / ATR indicator windows
+- Swing/mitigation state machine behind generate_signals
+- Position simulation (entries, TP/SL, close-all events, P&L, balance)
+
+All functions take NumPy arrays and scalars only, so they compile in
+nopython mode. See _njit.py for the fallback when numba is missing, and
+build_kernel.py for an ahead-of-time build of the position and strategy
+kernels.
+"""
+
+import hashlib
+import warnings
+import numpy as np
+from _njit import njit, NUMBA_AVAILABLE
+
+
+# Exit reason codes used by _simulate_positions (0 = no event)
+TP_HIT = 1
+SL_HIT = 2
+DAILY_RESET = 3
+END_OF_DAY = 4
+NEWS = 5
+END_OF_DATA = 6
+
+EXIT_REASONS = {
+    TP_HIT: 'TP_HIT',
+    SL_HIT: 'SL_HIT',
+    DAILY_RESET: 'DAILY_RESET',
+    END_OF_DAY: 'END_OF_DAY',
+    NEWS: 'NEWS',
+    END_OF_DATA: 'END_OF_DATA',
+}
+
+
+@njit(cache=True)
+def _is_swing_high(high, idx, lookback):
+    """HIGH at idx is strictly greater than `lookback` candles on each side"""
+    if idx < lookback or idx >= len(high) - lookback:
+        return False
+
+    center = high[idx]
+    for i in range(idx - lookback, idx + lookback + 1):
+        if i != idx and high[i] >= center:
+            return False
+    return True
+
+
+@njit(cache=True)
+def _is_swing_low(low, idx, lookback):
+    """LOW at idx is strictly lower than `lookback` candles on each side"""
+    if idx < lookback or idx >= len(low) - lookback:
+        return False
+
+    center = low[idx]
+    for i in range(idx - lookback, idx + lookback + 1):
+        if i != idx and low[i] <= center:
+            return False
+    return True
+
+
+def _true_range_series(high, low, close):
+    """
+    True range of every candle against the previous close, in one vectorized
+    pass (candle 0 has no previous close: its high - low). Shared by the ADX
+    and ATR kernels so TR is computed once per DataFrame
+    """
+    tr = np.empty(len(close))
+    if len(close) == 0:
+        return tr
+    tr[0] = high[0] - low[0]
+    h_l = high[1:] - low[1:]
+    h_pc = np.abs(high[1:] - close[:-1])
+    l_pc = np.abs(low[1:] - close[:-1])
+    tr[1:] = np.maximum(h_l, np.maximum(h_pc, l_pc))
+    return tr
+
+
+@njit(cache=True)
+def _adx(tr, high, low, current_idx, period):
+    """DX over the `period` candles up to current_idx (mirrors calculate_adx)"""
+    if current_idx < period + 1:
+        return 50.0  # Default to "trending" if not enough data
+
+    # Simple sums of TR, +DM and -DM over the last `period` candles
+    tr_sum = 0.0
+    plus_dm_sum = 0.0
+    minus_dm_sum = 0.0
+    for i in range(current_idx - period + 1, current_idx + 1):
+        tr_sum += tr[i]
+
+        up_move = high[i] - high[i - 1]
+        down_move = low[i - 1] - low[i]
+        if up_move > down_move and up_move > 0:
+            plus_dm_sum += up_move
+        if down_move > up_move and down_move > 0:
+            minus_dm_sum += down_move
+
+    atr = tr_sum / period
+    if atr == 0:
+        return 0.0  # No movement = ranging
+
+    plus_di = 100 * ((plus_dm_sum / period) / atr)
+    minus_di = 100 * ((minus_dm_sum / period) / atr)
+
+    di_sum = plus_di + minus_di
+    if di_sum == 0:
+        return 0.0
+
+    return 100 * abs(plus_di - minus_di) / di_sum
+
+
+@njit(cache=True)
+def _atr(tr, current_idx, period):
+    """Average true range of the `period` candles up to current_idx (mirrors calculate_atr)"""
+    if current_idx < period:
+        return 0.0003  # Default ATR value
+
+    tr_sum = 0.0
+    for i in range(current_idx - period + 1, current_idx + 1):
+        tr_sum += tr[i]
+    return tr_sum / period
+
+
+@njit(cache=True)
+def _adx_series(tr, high, low, period):
+    """_adx at every candle (tr from _true_range_series)"""
+    out = np.empty(len(tr))
+    for i in range(len(tr)):
+        out[i] = _adx(tr, high, low, i, period)
+    return out
+
+
+@njit(cache=True)
+def _atr_series(tr, period):
+    """_atr at every candle (tr from _true_range_series)"""
+    out = np.empty(len(tr))
+    for i in range(len(tr)):
+        out[i] = _atr(tr, i, period)
+    return out
+
+
+# NumPy versions of the indicator series for when numba is missing (the
+# plain-Python kernels loop per candle); window sums are added left to
+# right, one shifted slice at a time, so results match the kernels exactly
+
+def _window_sums(values, period):
+    """values[j] + ... + values[j + period - 1] for every full window, in order"""
+    total = np.zeros(len(values) - period + 1)
+    for k in range(period):
+        total = total + values[k:len(values) - period + 1 + k]
+    return total
+
+
+def _atr_series_np(tr, period):
+    """_atr_series without numba"""
+    out = np.full(len(tr), 0.0003)
+    if len(tr) > period:
+        out[period:] = _window_sums(tr[1:], period) / period
+    return out
+
+
+def _adx_series_np(tr, high, low, period):
+    """_adx_series without numba"""
+    out = np.full(len(tr), 50.0)
+    if len(tr) <= period + 1:
+        return out
+
+    up_move = high[1:] - high[:-1]
+    down_move = low[:-1] - low[1:]
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+
+    # Windows ending at candles period+1 .. n-1
+    atr = _window_sums(tr[1:], period)[1:] / period
+    plus_dm_avg = _window_sums(plus_dm, period)[1:] / period
+    minus_dm_avg = _window_sums(minus_dm, period)[1:] / period
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * (plus_dm_avg / atr)
+        minus_di = 100 * (minus_dm_avg / atr)
+        di_sum = plus_di + minus_di
+        dx = 100 * np.abs(plus_di - minus_di) / di_sum
+
+    out[period + 1:] = np.where(atr == 0, 0.0, np.where(di_sum == 0, 0.0, dx))
+    return out
+
+
+if not NUMBA_AVAILABLE:
+    _atr_series = _atr_series_np
+    _adx_series = _adx_series_np
+
+
+@njit(cache=True)
+def _trailing_mean(values, window, default):
+    """
+    Mean of the `window` values before each index, summed left to right
+    (default where fewer than `window` values precede it)
+    """
+    n = len(values)
+    out = np.full(n, default)
+    for i in range(window, n):
+        total = 0.0
+        for j in range(i - window, i):
+            total += values[j]
+        out[i] = total / window
+    return out
+
+
+@njit(cache=True)
+def _volatility_spike(high, low, lookback):
+    """
+    is_high_volatility_recent at every candle: any of the last `lookback`
+    ranges above 2x the mean of the 20 ranges before the candle
+    (negative window starts wrap to the end, like the per-candle loop)
+    """
+    n = len(high)
+    spike = np.zeros(n, np.bool_)
+    for i in range(lookback + 14, n):
+        range_sum = 0.0
+        for j in range(i - 20, i):
+            range_sum += high[j] - low[j]
+        avg_range = range_sum / 20
+
+        for j in range(i - lookback, i):
+            if high[j] - low[j] > avg_range * 2:
+                spike[i] = True
+                break
+    return spike
+
+
+# Signal types emitted by _run_strategy
+SIGNAL_DAILY_RESET = 0
+SIGNAL_BIAS_CHANGE = 1
+SIGNAL_ENTRY = 2
+
+# Bias codes (TrendFollowingStrategy.bias_code)
+BIAS_NONE = 0
+BIAS_LONG = 1
+BIAS_SHORT = -1
+
+
+@njit(cache=True)
+def _last_true_before(mask):
+    """
+    Running "last green / red candle" pointer over an is_green / is_red mask:
+    element j is the last True index before j, or -1 (length len(mask) + 1).
+    Built once per frame by TrendFollowingStrategy.candle_arrays and shared
+    with run_strategy
+    """
+    n = len(mask)
+    last_before = np.empty(n + 1, np.int64)
+    last_before[0] = -1
+    for j in range(n):
+        if mask[j]:
+            last_before[j + 1] = j
+        else:
+            last_before[j + 1] = last_before[j]
+    return last_before
+
+
+@njit(cache=True)
+def _last_counter_candle(last_before, before_idx, max_lookback=100):
+    """Last counter candle before before_idx within max_lookback candles, or -1"""
+    idx = last_before[before_idx]
+    if idx < before_idx - max_lookback:
+        return -1
+    return idx
+
+
+@njit(cache=True)
+def _run_strategy(last_red, last_green, high, low, close, hour, day, swing_high, swing_low,
+                  tradable, analysis_start, analysis_end, trading_end, swing_lookback):
+    """
+    Swing/mitigation state machine of generate_signals over whole arrays
+
+    Mirrors check_daily_reset, update_swing_levels, check_bias_change and
+    should_enter per candle, starting from a fresh strategy state.
+    None levels are NaN, None indices -1.
+
+    Args:
+        last_red, last_green: _last_true_before of the red (close < open) /
+            green (close > open) masks, for O(1) counter-candle lookups
+        hour, day: Candle hour (int8) and epoch day number (int64)
+        swing_high, swing_low: Swing flags per candle (TrendFollowingStrategy.swing_flags)
+        tradable: is_trading_hours per candle (entries allowed)
+
+    Returns:
+        (sig_idx, sig_type, sig_bias, sig_mitigation_high, sig_mitigation_low) in emit order,
+        final (bias, mitigation_high, mitigation_low, mitigation_candle_idx,
+               reference_high, reference_low, reference_high_idx, reference_low_idx,
+               last_bias_change_idx, last_day),
+        pending (highest high price, its idx, last high idx,
+                 lowest low price, its idx, last low idx), idx -1 = none pending,
+        per candle (bias, mitigation_high, mitigation_low) after its bias check
+    """
+    n = len(close)
+
+    # Emitted signals (at most one of each type per candle)
+    sig_idx = np.empty(3 * n, np.int64)
+    sig_type = np.empty(3 * n, np.int8)
+    sig_bias = np.empty(3 * n, np.int8)
+    sig_mh = np.empty(3 * n)
+    sig_ml = np.empty(3 * n)
+    n_sig = 0
+
+    # State of every candle, as the per-candle strategy loop records it
+    bias_at = np.empty(n, np.int8)
+    mh_at = np.empty(n)
+    ml_at = np.empty(n)
+
+    # Pending swings: first max high / min low kept on append (idx -1 = none),
+    # plus the last added index for the duplicate check
+    ph_price = np.nan
+    ph_idx = -1
+    ph_last = -1
+    pl_price = np.nan
+    pl_idx = -1
+    pl_last = -1
+
+    bias = BIAS_LONG
+    mh = np.nan
+    ml = np.nan
+    m_idx = -1
+    ref_high = np.nan
+    ref_low = np.nan
+    ref_high_idx = -1
+    ref_low_idx = -1
+    last_bias_change_idx = -1
+    last_day = np.iinfo(np.int64).min
+
+    for i in range(n):
+        h = hour[i]
+
+        # 1. Daily reset at the first analysis-period candle of a new day
+        if day[i] != last_day and analysis_start <= h < analysis_end:
+            bias = BIAS_LONG
+            mh = np.nan
+            ml = np.nan
+            m_idx = -1
+            ref_high = np.nan
+            ref_low = np.nan
+            ref_high_idx = -1
+            ref_low_idx = -1
+            ph_idx = -1
+            ph_last = -1
+            pl_idx = -1
+            pl_last = -1
+            last_bias_change_idx = -1
+            last_day = day[i]
+
+            sig_idx[n_sig] = i
+            sig_type[n_sig] = SIGNAL_DAILY_RESET
+            sig_bias[n_sig] = bias
+            sig_mh[n_sig] = np.nan
+            sig_ml[n_sig] = np.nan
+            n_sig += 1
+
+        active = analysis_start <= h < trading_end
+
+        # 2. Swing levels (analysis + trading hours only)
+        if active:
+            # Initialize references with the first swings (first max/min wins ties)
+            if np.isnan(ref_high) and ph_idx >= 0:
+                ref_high = ph_price
+                ref_high_idx = ph_idx
+
+            if np.isnan(ref_low) and pl_idx >= 0:
+                ref_low = pl_price
+                ref_low_idx = pl_idx
+
+            # New swing candidates, confirmed swing_lookback candles later
+            if i >= swing_lookback + 2:
+                swing_idx = i - swing_lookback
+                if swing_high[swing_idx] and (ph_idx < 0 or ph_last != swing_idx):
+                    ph_last = swing_idx
+                    if ph_idx < 0 or high[swing_idx] > ph_price:
+                        ph_price = high[swing_idx]
+                        ph_idx = swing_idx
+                if swing_low[swing_idx] and (pl_idx < 0 or pl_last != swing_idx):
+                    pl_last = swing_idx
+                    if pl_idx < 0 or low[swing_idx] < pl_price:
+                        pl_price = low[swing_idx]
+                        pl_idx = swing_idx
+
+            # Pending highs confirmed by a break of the reference low
+            if not np.isnan(ref_low) and ph_idx >= 0 and low[i] < ref_low:
+                ref_high = ph_price
+                ref_high_idx = ph_idx
+                ph_idx = -1
+                ph_last = -1
+
+                # LONG: mitigation = last red candle up to the new high
+                if bias == BIAS_LONG:
+                    k = _last_counter_candle(last_red, ref_high_idx + 1, 100)
+                    if k >= 0:
+                        mh = high[k]
+                        ml = low[k]
+                        m_idx = k
+
+            # Pending lows confirmed by a break of the reference high
+            if not np.isnan(ref_high) and pl_idx >= 0 and high[i] > ref_high:
+                ref_low = pl_price
+                ref_low_idx = pl_idx
+                pl_idx = -1
+                pl_last = -1
+
+                # SHORT: mitigation = last green candle up to the new low
+                if bias == BIAS_SHORT:
+                    k = _last_counter_candle(last_green, ref_low_idx + 1, 100)
+                    if k >= 0:
+                        mh = high[k]
+                        ml = low[k]
+                        m_idx = k
+
+        # 3. Bias change on a close through the mitigation zone
+        if active and not np.isnan(mh):
+            changed = False
+            if bias == BIAS_LONG:
+                if close[i] < ml:
+                    bias = BIAS_SHORT
+                    k = _last_counter_candle(last_green, i, 100)
+                    if k < 0:
+                        k = i  # Fallback: use current candle
+                    mh = high[k]
+                    ml = low[k]
+                    m_idx = k
+                    changed = True
+            elif close[i] > mh:
+                bias = BIAS_LONG
+                k = _last_counter_candle(last_red, i, 100)
+                if k < 0:
+                    k = i  # Fallback: use current candle
+                mh = high[k]
+                ml = low[k]
+                m_idx = k
+                changed = True
+                last_bias_change_idx = i
+
+            if changed:
+                sig_idx[n_sig] = i
+                sig_type[n_sig] = SIGNAL_BIAS_CHANGE
+                sig_bias[n_sig] = bias
+                sig_mh[n_sig] = mh
+                sig_ml[n_sig] = ml
+                n_sig += 1
+
+        bias_at[i] = bias
+        mh_at[i] = mh
+        ml_at[i] = ml
+
+        # 4. Entry whenever trading is allowed and a mitigation zone is set
+        if tradable[i] and not np.isnan(mh):
+            sig_idx[n_sig] = i
+            sig_type[n_sig] = SIGNAL_ENTRY
+            sig_bias[n_sig] = bias
+            sig_mh[n_sig] = mh
+            sig_ml[n_sig] = ml
+            n_sig += 1
+
+    return ((sig_idx[:n_sig], sig_type[:n_sig], sig_bias[:n_sig], sig_mh[:n_sig], sig_ml[:n_sig]),
+            (bias, mh, ml, m_idx, ref_high, ref_low, ref_high_idx, ref_low_idx,
+             last_bias_change_idx, last_day),
+            (ph_price, ph_idx, ph_last, pl_price, pl_idx, pl_last),
+            (bias_at, mh_at, ml_at))
+
+
+@njit(cache=True)
+def _round_cents(x):
+    """
+    round(x, 2) as CPython computes it: the exact binary value of x is rounded
+    to 2 decimals, ties to even (numba's round scales by 100 first, which can
+    round the other way, e.g. 2.675 -> 2.68 instead of 2.67)
+    """
+    if not np.isfinite(x):
+        return x
+    y = abs(x)
+
+    # y * 100 == p + err exactly (Dekker product; 100 needs no splitting)
+    p = y * 100.0
+    split = y * 134217729.0  # 2**27 + 1
+    y_hi = split - (split - y)
+    y_lo = y - y_hi
+    err = (y_hi * 100.0 - p) + y_lo * 100.0
+
+    # Compare the exact y * 100 with the midpoint k + 0.5 (p - (k + 0.5) is exact)
+    k = np.floor(p)
+    d = p - (k + 0.5)
+    if d > 0 or (d == 0 and err > 0):
+        k += 1.0
+    elif d == 0 and err == 0 and k % 2 == 1:
+        k += 1.0  # Exact tie: round half to even
+
+    cents = k / 100.0
+    return cents if x >= 0 else -cents
+
+
+@njit(cache=True)
+def _position_size(balance, entry_price, sl_price, risk_per_trade, max_sl_fraction,
+                   pip_size, value_per_lot):
+    """Lot size for a given SL distance (same steps and rounding as calculate_position_size)"""
+    sl_distance = abs(entry_price - sl_price)
+    if sl_distance == 0:
+        return 0.0
+
+    risk_amount = balance * risk_per_trade
+    sl_units = sl_distance / pip_size
+
+    lot_size = _round_cents(risk_amount / (sl_units * value_per_lot))
+
+    # Cap the loss at max_sl_fraction of balance
+    max_sl_amount = balance * max_sl_fraction
+    potential_loss = lot_size * sl_units * value_per_lot
+    if potential_loss > max_sl_amount:
+        lot_size = _round_cents(max_sl_amount / (sl_units * value_per_lot))
+
+    if lot_size < 0.01:
+        lot_size = 0.01
+    return lot_size
+
+
+@njit(cache=True)
+def _position_pnl(is_long, entry_price, exit_price, lot_size, pip_size, value_per_lot,
+                  spread_pips):
+    """P&L of a closed position (mirrors Position.close_position)"""
+    if is_long:
+        units = (exit_price - entry_price) / pip_size
+    else:
+        units = (entry_price - exit_price) / pip_size
+    units -= spread_pips
+    return units * lot_size * value_per_lot
+
+
+@njit(cache=True)
+def _simulate_positions(high, low, close, is_long, mitigation_high, mitigation_low,
+                        can_enter, tp_pips, close_code, initial_balance, risk_per_trade,
+                        max_sl_fraction, pip_size, value_per_lot, spread_pips,
+                        max_open_positions, close_at_end):
+    """
+    Simulate positions over precomputed per-candle strategy state
+
+    Per candle, in the same order as the Python backtest loop:
+    1. close_code[i] != 0: close all open positions at the close
+    2. TP (intrabar high/low) then SL (close outside mitigation) per position
+    3. Open a position at the close if can_enter[i] (NaN tp_pips = no TP)
+
+    Args:
+        is_long, mitigation_high, mitigation_low: Strategy state after candle i
+        max_open_positions: Concurrent position limit (-1 = no limit)
+        close_at_end: Close remaining positions at the last close (END_OF_DATA)
+
+    Returns:
+        (entry_idx, pos_long, lot_size, sl_price, tp_price) indexed by position id - 1,
+        (closed_id, exit_idx, exit_price, exit_code) in closing order,
+        final balance
+    """
+    n = len(close)
+
+    # Positions, indexed by position id - 1 (at most one entry per candle)
+    entry_idx = np.empty(n, np.int64)
+    pos_long = np.empty(n, np.bool_)
+    lot_size = np.empty(n)
+    sl_price = np.empty(n)
+    tp_price = np.empty(n)
+
+    # Exits, in closing order
+    closed_id = np.empty(n, np.int64)
+    exit_idx = np.empty(n, np.int64)
+    exit_price = np.empty(n)
+    exit_code = np.empty(n, np.int8)
+
+    open_ids = np.empty(n, np.int64)
+    n_positions = 0
+    n_open = 0
+    n_closed = 0
+    balance = initial_balance
+
+    for i in range(n):
+        code = close_code[i]
+
+        # 1. Close-all events (daily reset, end of day, news)
+        if code != 0:
+            for j in range(n_open):
+                pid = open_ids[j]
+                balance += _position_pnl(pos_long[pid], close[entry_idx[pid]], close[i],
+                                         lot_size[pid], pip_size, value_per_lot, spread_pips)
+                closed_id[n_closed] = pid
+                exit_idx[n_closed] = i
+                exit_price[n_closed] = close[i]
+                exit_code[n_closed] = code
+                n_closed += 1
+            n_open = 0
+
+        # 2. TP / SL per open position (kept in opening order)
+        kept = 0
+        for j in range(n_open):
+            pid = open_ids[j]
+            if pos_long[pid]:
+                tp_hit = high[i] >= tp_price[pid]
+                sl_hit = close[i] < mitigation_low[i]
+            else:
+                tp_hit = low[i] <= tp_price[pid]
+                sl_hit = close[i] > mitigation_high[i]
+
+            if tp_hit:
+                px = tp_price[pid]
+                reason = TP_HIT
+            elif sl_hit:
+                px = close[i]
+                reason = SL_HIT
+            else:
+                open_ids[kept] = pid
+                kept += 1
+                continue
+
+            balance += _position_pnl(pos_long[pid], close[entry_idx[pid]], px,
+                                     lot_size[pid], pip_size, value_per_lot, spread_pips)
+            closed_id[n_closed] = pid
+            exit_idx[n_closed] = i
+            exit_price[n_closed] = px
+            exit_code[n_closed] = reason
+            n_closed += 1
+        n_open = kept
+
+        # 3. Entry at the close
+        if not can_enter[i]:
+            continue
+        if max_open_positions >= 0 and n_open >= max_open_positions:
+            continue
+
+        entry = close[i]
+        sl = mitigation_low[i] if is_long[i] else mitigation_high[i]
+        lot = _position_size(balance, entry, sl, risk_per_trade, max_sl_fraction,
+                             pip_size, value_per_lot)
+        if lot <= 0:
+            continue
+
+        pid = n_positions
+        entry_idx[pid] = i
+        pos_long[pid] = is_long[i]
+        lot_size[pid] = lot
+        sl_price[pid] = sl
+        tp_distance = tp_pips[i] * pip_size
+        tp_price[pid] = entry + tp_distance if is_long[i] else entry - tp_distance
+        n_positions += 1
+
+        open_ids[n_open] = pid
+        n_open += 1
+
+    # Close any remaining positions at the last close
+    if close_at_end and n > 0:
+        for j in range(n_open):
+            pid = open_ids[j]
+            balance += _position_pnl(pos_long[pid], close[entry_idx[pid]], close[n - 1],
+                                     lot_size[pid], pip_size, value_per_lot, spread_pips)
+            closed_id[n_closed] = pid
+            exit_idx[n_closed] = n - 1
+            exit_price[n_closed] = close[n - 1]
+            exit_code[n_closed] = END_OF_DATA
+            n_closed += 1
+
+    return (entry_idx[:n_positions], pos_long[:n_positions], lot_size[:n_positions],
+            sl_price[:n_positions], tp_price[:n_positions],
+            closed_id[:n_closed], exit_idx[:n_closed], exit_price[:n_closed],
+            exit_code[:n_closed], balance)
+
+
+def kernel_source_hash():
+    """
+    Hash of this module's source as a positive int64, embedded by
+    build_kernel.py so a build from older kernel code can be detected
+    """
+    with open(__file__, 'rb') as f:
+        return int(hashlib.sha256(f.read()).hexdigest()[:15], 16)
+
+
+# Prefer the ahead-of-time build from build_kernel.py (skips JIT warmup),
+# unless it was built from a different version of this module
+try:
+    import backtest_kernel
+except ImportError:
+    backtest_kernel = None
+
+_built_hash = getattr(backtest_kernel, 'source_hash', None)  # Missing in pre-hash builds
+if backtest_kernel is not None and (_built_hash is None or _built_hash() != kernel_source_hash()):
+    warnings.warn("backtest_kernel was built from an older _backtest_loop.py - "
+                  "using the JIT kernels (re-run build_kernel.py)")
+    backtest_kernel = None
+
+if backtest_kernel is not None:
+    simulate_positions = backtest_kernel.simulate_positions
+    run_strategy = backtest_kernel.run_strategy
+    KERNEL_AOT = True
+else:
+    simulate_positions = _simulate_positions
+    run_strategy = _run_strategy
+    KERNEL_AOT = False
@@ -0,0 +1,21 @@
+"""
+Optional Numba support
+Uses numba.njit when installed, otherwise a no-op decorator so the
+kernels still run as plain Python (slower, same results)
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports @njit and @njit(...))"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
@@ -3,19 +3,47 @@ Backtesting Engine - CORRECTED VERSION
 Simulates trading with position management, TP/SL execution, and P&L tracking
 """
 
-import pandas as pd
 import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from strategy import TrendFollowingStrategy, generate_signals
+from _backtest_loop import simulate_positions, EXIT_REASONS, NEWS
+from data_loader import load_candles
 from config import *
 
 
+# Lightweight per-candle record; fields match the OHLC column names so
+# consumers can use attribute access on either this or a DataFrame row
+Candle = namedtuple('Candle', ['time', 'open', 'high', 'low', 'close'])
+
+
+def iter_candles(df):
+    """
+    Yield one Candle per row, reading from column arrays extracted once
+    (avoids building a pandas Series per candle with df.iloc[i])
+    """
+    times = df['time'].tolist()  # Timestamps (strategy uses .hour / .date())
+    opens = df['open'].to_numpy()
+    highs = df['high'].to_numpy()
+    lows = df['low'].to_numpy()
+    closes = df['close'].to_numpy()
+
+    for i in range(len(df)):
+        yield i, Candle(times[i], opens[i], highs[i], lows[i], closes[i])
+
+
 class Position:
     """Represents a single trading position"""
+
+    # Fixed attribute set: no per-instance __dict__ for the many positions of a long run
+    __slots__ = ('position_id', 'entry_time', 'entry_price', 'direction', 'lot_size',
+                 'sl_price', 'symbol', 'spread_pips', 'tp_price', 'status',
+                 'exit_time', 'exit_price', 'exit_reason', 'pnl')
     
     def __init__(self, entry_time, entry_price, direction, lot_size,
                  sl_price, tp_pips, symbol, position_id, spread_pips=0):
@@ -57,19 +85,19 @@ class Position:
         if self.tp_price is None:
             return False
         if self.direction == 'LONG':
-            return candle['high'] >= self.tp_price
+            return candle.high >= self.tp_price
         else:
-            return candle['low'] <= self.tp_price
+            return candle.low <= self.tp_price
     
     
     def check_sl_hit(self, candle, mitigation_high, mitigation_low):
         """Check if SL was hit (body close outside mitigation)"""
         if self.direction == 'LONG':
             # LONG SL = close below mitigation LOW
-            return candle['close'] < mitigation_low
+            return candle.close < mitigation_low
         else:
             # SHORT SL = close above mitigation HIGH
-            return candle['close'] > mitigation_high
+            return candle.close > mitigation_high
     
     
     def close_position(self, exit_time, exit_price, exit_reason):
@@ -117,14 +145,20 @@ class Backtester:
     """Backtest engine with position management"""
     
     def __init__(self, initial_balance, symbol):
-        self.initial_balance = initial_balance
-        self.balance = initial_balance
         self.symbol = symbol
-        
+        self.reset(initial_balance)
+
+    def reset(self, initial_balance=None):
+        """Clear all positions and restart from initial_balance (default: the current one)"""
+        if initial_balance is not None:
+            self.initial_balance = initial_balance
+        self.balance = self.initial_balance
+
         self.positions = []  # All positions (open + closed)
         self.open_positions = []  # Currently open positions
         self.closed_positions = []  # Closed positions
-        
+        self._n_open = 0  # len(open_positions), kept in sync by open/close_position
+
         self.position_counter = 0
         self.equity_curve = []
         
@@ -148,6 +182,7 @@ class Backtester:
 
         self.positions.append(position)
         self.open_positions.append(position)
+        self._n_open += 1
 
         return position
     
@@ -158,6 +193,7 @@ class Backtester:
         
         self.balance += pnl
         self.open_positions.remove(position)
+        self._n_open -= 1
         self.closed_positions.append(position)
         
         return pnl
@@ -182,21 +218,89 @@ class Backtester:
 
             # 1. Check individual TP (if enabled)
             if position.tp_price is not None and position.check_tp_hit(candle):
-                self.close_position(position, candle['time'], position.tp_price, 'TP_HIT')
+                self.close_position(position, candle.time, position.tp_price, 'TP_HIT')
                 continue
 
             # 2. BIAS_CHANGE DISABLED - close positions only at TP or SL
             # if (position.direction == 'LONG' and current_bias == 'SHORT') or \
             #    (position.direction == 'SHORT' and current_bias == 'LONG'):
-            #     self.close_position(position, candle['time'], candle['close'], 'BIAS_CHANGE')
+            #     self.close_position(position, candle.time, candle.close, 'BIAS_CHANGE')
             #     continue
 
             # 3. Check SL (mitigation break - body close)
             if position.check_sl_hit(candle, mitigation_high, mitigation_low):
-                self.close_position(position, candle['time'], candle['close'], 'SL_HIT')
+                self.close_position(position, candle.time, candle.close, 'SL_HIT')
                 continue
     
     
+    def simulate(self, df, state, strategy, spread_pips=0, max_open_positions=None,
+                 close_at_end=False):
+        """
+        Run the compiled position kernel over per-candle strategy state and
+        record the resulting positions and balance on this backtester
+
+        Args:
+            df: OHLC DataFrame the state was computed on
+            state: Dict of per-candle arrays from the strategy pass:
+                is_long, mitigation_high, mitigation_low (NaN = not set),
+                can_enter, tp_pips, close_code (_backtest_loop exit codes),
+                news_event (candle index -> event name for NEWS closes)
+            strategy: TrendFollowingStrategy providing the risk settings
+            max_open_positions: Concurrent position limit (None = no limit)
+            close_at_end: Close remaining positions at the last candle
+        """
+        if strategy.symbol != self.symbol:
+            strategy.set_symbol(self.symbol)
+        pip_size = strategy.pip_size
+        value_per_lot = float(strategy.value_per_lot)
+
+        close = df['close'].to_numpy(dtype=np.float64)
+        (entry_idx, pos_long, lot_size, sl_price, tp_price,
+         closed_id, exit_idx, exit_price, exit_code, _) = simulate_positions(
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            close,
+            state['is_long'],
+            state['mitigation_high'],
+            state['mitigation_low'],
+            state['can_enter'],
+            state['tp_pips'],
+            state['close_code'],
+            float(self.balance),
+            strategy.risk_per_trade,
+            strategy.max_stop_loss_percent,
+            pip_size,
+            value_per_lot,
+            float(spread_pips),
+            -1 if max_open_positions is None else max_open_positions,
+            close_at_end,
+        )
+
+        # Replay kernel output as regular Position objects
+        times = df['time'].tolist()
+        tp_pips = state['tp_pips']
+        opened = []
+        for pid, i in enumerate(entry_idx):
+            opened.append(self.open_position(
+                entry_time=times[i],
+                entry_price=close[i],
+                direction='LONG' if pos_long[pid] else 'SHORT',
+                lot_size=lot_size[pid],
+                sl_price=sl_price[pid],
+                tp_pips=None if np.isnan(tp_pips[i]) else tp_pips[i],
+                spread_pips=spread_pips
+            ))
+
+        for pid, i, price, code in zip(closed_id, exit_idx, exit_price, exit_code):
+            if code == NEWS:
+                reason = f"NEWS_{state['news_event'][i]}"
+            else:
+                reason = EXIT_REASONS[code]
+            self.close_position(opened[pid], times[i], price, reason)
+
+        return self.balance
+
+
     def get_stats(self):
         """Calculate backtest statistics"""
         if not self.closed_positions:
@@ -270,34 +374,48 @@ def run_backtest(df, symbol, initial_balance, strategy_params):
     # Main backtest loop
     print("\nRunning backtest...")
 
-    for i in range(0, len(df)):
-        candle = df.iloc[i]
+    from config import MAX_OPEN_POSITIONS, SPREAD_PIPS
+
+    # News blackout (and the event it reports) for every candle, computed once
+    news_mask = None
+    if strategy.enable_news_filter and strategy.news_filter:
+        news_mask, news_name_idx, news_labels = strategy.news_filter.news_mask(df['time'])
+
+    # Swing candidates and the entry mask (trading hours, news, ADX/ATR filters)
+    # for every candle, computed once
+    swing_high, swing_low = strategy.swing_flags(df)
+    tradable = strategy.trading_hours_mask(df, news_mask) & strategy.market_filters_mask(df)
+
+    # Methods called on every candle, bound once outside the loop
+    check_daily_reset = strategy.check_daily_reset
+    should_close_all_positions = strategy.should_close_all_positions
+    step = strategy.step
+    should_enter = strategy.should_enter
+    update_positions = backtester.update_positions
+
+    for i, candle in iter_candles(df):
 
         # Check for daily reset
-        if strategy.check_daily_reset(candle['time']):
+        if check_daily_reset(candle.time, df, i):
             # Close all positions at start of new day
-            if backtester.open_positions:
-                backtester.close_all_positions(candle['time'], candle['close'], 'DAILY_RESET')
+            if backtester._n_open:
+                backtester.close_all_positions(candle.time, candle.close, 'DAILY_RESET')
 
         # Check if we should close all positions (20:00)
-        if strategy.should_close_all_positions(candle['time']):
-            if backtester.open_positions:
-                backtester.close_all_positions(candle['time'], candle['close'], 'END_OF_DAY')
+        if should_close_all_positions(candle.time, df, i):
+            if backtester._n_open:
+                backtester.close_all_positions(candle.time, candle.close, 'END_OF_DAY')
 
         # Check if news time - close all positions
-        if strategy.enable_news_filter and strategy.news_filter:
-            is_news, event = strategy.news_filter.is_news_time(candle['time'])
-            if is_news and backtester.open_positions:
-                backtester.close_all_positions(candle['time'], candle['close'], f'NEWS_{event}')
-
-        # Update swing levels
-        strategy.update_swing_levels(df, i)
+        if news_mask is not None and news_mask[i] and backtester._n_open:
+            event = news_labels[news_name_idx[i]]
+            backtester.close_all_positions(candle.time, candle.close, f'NEWS_{event}')
 
-        # Check for bias change
-        bias_changed = strategy.check_bias_change(df, i)
+        # Update swing levels and check for bias change
+        bias_changed = step(df, i, swing_high, swing_low)
 
         # Update all open positions (TP, SL, bias change)
-        backtester.update_positions(
+        update_positions(
             candle,
             strategy.bias,
             strategy.mitigation_high,
@@ -305,44 +423,43 @@ def run_backtest(df, symbol, initial_balance, strategy_params):
         )
 
         # Entry logic: during trading hours (with ADX filter), if mitigation is set
-        if strategy.is_trading_hours(candle['time'], df, i) and strategy.should_enter(candle):
+        if tradable[i] and should_enter():
             # Check max position limit (if set)
-            from config import MAX_OPEN_POSITIONS, SPREAD_PIPS
-            if MAX_OPEN_POSITIONS is not None and len(backtester.open_positions) >= MAX_OPEN_POSITIONS:
+            if MAX_OPEN_POSITIONS is not None and backtester._n_open >= MAX_OPEN_POSITIONS:
                 continue  # Skip entry if max positions reached
 
-            if strategy.mitigation_high is not None and strategy.mitigation_low is not None:
-                entry_price = strategy.get_entry_price(candle)
-                lot_size = strategy.calculate_position_size(backtester.balance, entry_price, symbol)
-
-                # Use fixed 25 pip TP
-                dynamic_tp = 25
-
-                if lot_size > 0:
-                    backtester.open_position(
-                        entry_time=candle['time'],
-                        entry_price=entry_price,
-                        direction=strategy.bias,
-                        lot_size=lot_size,
-                        sl_price=strategy.get_sl_price(),
-                        tp_pips=dynamic_tp,  # Use dynamic TP instead of fixed
-                        spread_pips=SPREAD_PIPS
-                    )
+            # (should_enter already checked that both mitigation levels are set)
+            entry_price = strategy.get_entry_price(candle.close)
+            lot_size = strategy.calculate_position_size(backtester.balance, entry_price, symbol)
+
+            # Use fixed 25 pip TP
+            dynamic_tp = 25
+
+            if lot_size > 0:
+                backtester.open_position(
+                    entry_time=candle.time,
+                    entry_price=entry_price,
+                    direction=strategy.bias,
+                    lot_size=lot_size,
+                    sl_price=strategy.get_sl_price(),
+                    tp_pips=dynamic_tp,  # Use dynamic TP instead of fixed
+                    spread_pips=SPREAD_PIPS
+                )
         
         # Track equity
         if i % 1000 == 0:
             pip_size = 0.01 if 'JPY' in symbol else 0.0001
             open_pnl = sum(
-                (p.lot_size * ((candle['close'] - p.entry_price) / pip_size) * 10)
+                (p.lot_size * ((candle.close - p.entry_price) / pip_size) * 10)
                 if p.direction == 'LONG' else
-                (p.lot_size * ((p.entry_price - candle['close']) / pip_size) * 10)
+                (p.lot_size * ((p.entry_price - candle.close) / pip_size) * 10)
                 for p in backtester.open_positions
             )
             current_equity = backtester.balance + open_pnl
             print(f"  Progress: {i}/{len(df)} | Balance: ${backtester.balance:,.2f} | Open: {len(backtester.open_positions)}")
     
     # Close any remaining positions
-    if backtester.open_positions:
+    if backtester._n_open:
         last_candle = df.iloc[-1]
         backtester.close_all_positions(last_candle['time'], last_candle['close'], 'END_OF_DATA')
     
@@ -352,6 +469,54 @@ def run_backtest(df, symbol, initial_balance, strategy_params):
     return backtester, stats
 
 
+# Frames of the current run_many call, held by each worker process
+_batch_frames = {}
+
+
+def _init_batch_worker(df_by_symbol):
+    """Pool initializer: receive the frames once per worker, not once per task"""
+    _batch_frames.update(df_by_symbol)
+
+
+def _batch_signals(symbol, params):
+    """generate_signals for one symbol / parameter set inside a worker"""
+    strategy = TrendFollowingStrategy(symbol=symbol, **params)
+    return generate_signals(_batch_frames[symbol], strategy)
+
+
+def run_many(df_by_symbol, params_grid, max_workers=None):
+    """
+    generate_signals for every symbol x parameter set in parallel processes
+    (each run is sequential, but runs are independent of each other)
+
+    Args:
+        df_by_symbol: Dict of symbol -> OHLC DataFrame
+        params_grid: List of TrendFollowingStrategy keyword dicts (without
+            'symbol' - each run uses the symbol of its frame)
+        max_workers: Process count (default: one per CPU)
+
+    Returns:
+        Dict of (symbol, params index) -> signals DataFrame
+    """
+    if any('symbol' in params for params in params_grid):
+        raise ValueError("params_grid entries must not set 'symbol' (taken from df_by_symbol)")
+
+    tasks = [(symbol, i) for symbol in df_by_symbol for i in range(len(params_grid))]
+    if not tasks:
+        return {}
+
+    max_workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_batch_worker,
+                             initargs=(df_by_symbol,)) as executor:
+        futures = {executor.submit(_batch_signals, symbol, params_grid[i]): (symbol, i)
+                   for symbol, i in tasks}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    return results
+
+
 def print_stats(stats):
     """Print backtest statistics"""
     print(f"\n{'='*60}")
@@ -379,8 +544,7 @@ if __name__ == "__main__":
     symbol = "EURUSD"
 
     # TESTING NOVEMBER 2025
-    df = pd.read_csv(f"data/raw/{symbol}_M15_2025-11-01_2025-11-30.csv")
-    df['time'] = pd.to_datetime(df['time'])
+    df = load_candles(f"data/raw/{symbol}_M15_2025-11-01_2025-11-30.csv")
 
     print(f"Loaded M15 data (NOVEMBER 2025): {len(df)} candles")
 
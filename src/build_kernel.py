@@ -0,0 +1,65 @@
+"""
+Ahead-of-time build of the backtest kernels
+Compiles _backtest_loop._simulate_positions and _run_strategy into a
+`backtest_kernel` extension module (next to this file) so backtests skip
+the Numba JIT warmup on every fresh run. The built module runs without
+numba installed.
+
+Usage: python src/build_kernel.py
+Re-run after changing _backtest_loop.py - the extension is a snapshot. It
+embeds a hash of the source it was built from; _backtest_loop warns and
+falls back to the JIT kernels when that hash no longer matches.
+"""
+
+import os
+import sys
+
+from numba.pycc import CC
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _backtest_loop import _simulate_positions, _run_strategy, kernel_source_hash
+
+# (entry_idx, pos_long, lot_size, sl_price, tp_price,
+#  closed_id, exit_idx, exit_price, exit_code, balance)
+RESULT_SIG = 'Tuple((i8[:], b1[:], f8[:], f8[:], f8[:], i8[:], i8[:], f8[:], i1[:], f8))'
+
+# high, low, close, is_long, mitigation_high, mitigation_low, can_enter, tp_pips,
+# close_code, initial_balance, risk_per_trade, max_sl_fraction, pip_size,
+# value_per_lot, spread_pips, max_open_positions, close_at_end
+ARGS_SIG = ('f8[:], f8[:], f8[:], b1[:], f8[:], f8[:], b1[:], f8[:], '
+            'i1[:], f8, f8, f8, f8, f8, f8, i8, b1')
+
+# signals (idx, type, bias, mitigation_high, mitigation_low),
+# final (bias, mh, ml, m_idx, ref_high, ref_low, ref_high_idx, ref_low_idx,
+#        last_bias_change_idx, last_day),
+# pending (high price, high idx, last high idx, low price, low idx, last low idx),
+# per candle (bias, mitigation_high, mitigation_low)
+STRATEGY_RESULT_SIG = ('Tuple((Tuple((i8[:], i1[:], i1[:], f8[:], f8[:])), '
+                       'Tuple((i8, f8, f8, i8, f8, f8, i8, i8, i8, i8)), '
+                       'Tuple((f8, i8, i8, f8, i8, i8)), '
+                       'Tuple((i1[:], f8[:], f8[:]))))')
+
+# last_red, last_green, high, low, close, hour, day, swing_high, swing_low, tradable,
+# analysis_start, analysis_end, trading_end, swing_lookback
+STRATEGY_ARGS_SIG = ('i8[:], i8[:], f8[:], f8[:], f8[:], i1[:], i8[:], b1[:], b1[:], b1[:], '
+                     'i8, i8, i8, i8')
+
+cc = CC('backtest_kernel')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+cc.export('simulate_positions', f'{RESULT_SIG}({ARGS_SIG})')(_simulate_positions.py_func)
+cc.export('run_strategy', f'{STRATEGY_RESULT_SIG}({STRATEGY_ARGS_SIG})')(_run_strategy.py_func)
+
+SOURCE_HASH = kernel_source_hash()
+
+
+def _source_hash():
+    return SOURCE_HASH  # Frozen into the build as a constant
+
+
+cc.export('source_hash', 'i8()')(_source_hash)
+
+
+if __name__ == "__main__":
+    print("Compiling backtest_kernel...")
+    cc.compile()
+    print(f"Saved to: {cc.output_dir}")
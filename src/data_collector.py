@@ -4,7 +4,7 @@ Downloads historical 1-minute OHLC data for specified forex pairs
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
+import numpy as np
 from datetime import datetime
 import os
 import sys
@@ -12,6 +12,7 @@ import sys
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import *
+from data_loader import rates_to_frame, save_feather
 
 
 def connect_mt5():
@@ -47,7 +48,7 @@ def download_data(symbol, timeframe, start_date, end_date):
         end_date: End date string "YYYY-MM-DD"
     
     Returns:
-        pandas.DataFrame with OHLC data
+        MT5 rates structured array (time as epoch seconds) with OHLC data
     """
     
     # Timeframe mapping
@@ -76,29 +77,38 @@ def download_data(symbol, timeframe, start_date, end_date):
         print(f"❌ No data retrieved, error code = {mt5.last_error()}")
         return None
     
-    # Convert to DataFrame
-    df = pd.DataFrame(rates)
-    df['time'] = pd.to_datetime(df['time'], unit='s')
+    # Keep MT5's structured array as-is (no DataFrame copy at download time)
+    print(f"✅ Downloaded {len(rates):,} candles")
+    print(f"   First candle: {np.datetime64(int(rates['time'][0]), 's')}")
+    print(f"   Last candle: {np.datetime64(int(rates['time'][-1]), 's')}")
     
-    print(f"✅ Downloaded {len(df):,} candles")
-    print(f"   First candle: {df['time'].iloc[0]}")
-    print(f"   Last candle: {df['time'].iloc[-1]}")
-    
-    return df
+    return rates
 
 
-def save_data(df, symbol, timeframe):
-    """Save data to CSV in data/raw folder"""
+def save_data(rates, symbol, timeframe):
+    """Save MT5 rates to data/raw folder (.npy as downloaded, plus CSV/Feather for backtests)"""
     
     # Create directory if not exists
     os.makedirs("data/raw", exist_ok=True)
     
     filename = f"data/raw/{symbol}_{timeframe}_{START_DATE}_{END_DATE}.csv"
+
+    # Native copy of the structured array
+    npy_file = os.path.splitext(filename)[0] + '.npy'
+    np.save(npy_file, rates)
+    print(f"💾 Saved to: {npy_file}")
+
+    df = rates_to_frame(rates)
     df.to_csv(filename, index=False)
     
     print(f"💾 Saved to: {filename}")
     print(f"   File size: {os.path.getsize(filename) / 1024 / 1024:.2f} MB")
 
+    # Feather copy for fast (memory-mapped) backtest loads
+    feather_file = save_feather(df, filename)
+    if feather_file:
+        print(f"💾 Saved to: {feather_file}")
+
 
 def main():
     """Main execution function"""
@@ -124,10 +134,10 @@ def main():
     
     for pair in PAIRS:
         try:
-            df = download_data(pair, TIMEFRAME, START_DATE, END_DATE)
+            rates = download_data(pair, TIMEFRAME, START_DATE, END_DATE)
             
-            if df is not None:
-                save_data(df, pair, TIMEFRAME)
+            if rates is not None:
+                save_data(rates, pair, TIMEFRAME)
                 successful.append(pair)
             else:
                 failed.append(pair)
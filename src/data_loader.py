@@ -0,0 +1,102 @@
+"""
+Candle Data Loader
+Reads OHLC files saved by the data collectors into DataFrames
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    from pyarrow import feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Column types of the MT5 OHLC CSVs, so pandas skips type inference
+# (prices stay float64 - float32 would shift TP/SL and P&L results)
+READ_CSV_KW = {
+    'dtype': {
+        'open': 'float64',
+        'high': 'float64',
+        'low': 'float64',
+        'close': 'float64',
+        'tick_volume': 'int32',
+        'spread': 'int16',
+        'real_volume': 'int64',
+    },
+    'parse_dates': ['time'],
+    'date_format': '%Y-%m-%d %H:%M:%S',
+}
+
+
+def fast_read_csv(path):
+    """
+    Read an OHLC CSV with the 'time' column parsed as datetime
+
+    Uses the multi-threaded pyarrow CSV engine when installed (datetime
+    parsing happens inside the Arrow reader), otherwise the default
+    pandas engine.
+    """
+    if PYARROW_AVAILABLE:
+        return pd.read_csv(path, engine='pyarrow', **READ_CSV_KW)
+
+    return pd.read_csv(path, **READ_CSV_KW)
+
+
+def feather_path_for(csv_path):
+    """Path of the Feather (Arrow IPC) copy kept next to a CSV file"""
+    return os.path.splitext(csv_path)[0] + '.feather'
+
+
+def save_feather(df, csv_path):
+    """
+    Write an uncompressed Feather copy of df next to csv_path
+    (uncompressed so later reads can memory-map it without decoding)
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+
+    path = feather_path_for(csv_path)
+    df.to_feather(path, compression='uncompressed')
+    return path
+
+
+def rates_to_frame(rates):
+    """
+    DataFrame from an MT5 rates structured array (e.g. np.load of a saved .npy)
+    The int64 epoch-second 'time' field is reinterpreted as datetime64[s]
+    instead of being parsed.
+    """
+    df = pd.DataFrame(rates)
+    df['time'] = rates['time'].astype('datetime64[s]')
+    return df
+
+
+def load_rates(npy_path):
+    """Load a saved MT5 rates array as a DataFrame (file is memory-mapped)"""
+    return rates_to_frame(np.load(npy_path, mmap_mode='r'))
+
+
+def load_candles(csv_path):
+    """
+    Load OHLC candles for a CSV file, preferring its Feather copy
+
+    The first load parses the CSV and converts it to Feather once; later
+    loads memory-map the Feather file instead of re-parsing text. A copy
+    older than the CSV is rebuilt.
+    """
+    if not PYARROW_AVAILABLE:
+        return fast_read_csv(csv_path)
+
+    path = feather_path_for(csv_path)
+    if os.path.exists(path) and (not os.path.exists(csv_path) or
+                                 os.path.getmtime(path) >= os.path.getmtime(csv_path)):
+        return feather.read_table(path, memory_map=True).to_pandas()
+
+    df = fast_read_csv(csv_path)
+    try:
+        save_feather(df, csv_path)
+    except OSError:
+        pass  # Read-only data directory - just use the CSV each time
+    return df
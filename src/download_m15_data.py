@@ -3,9 +3,10 @@ Download M15 (15-minute) data from MT5
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import os
+from data_loader import rates_to_frame, save_feather
 
 # Initialize MT5
 if not mt5.initialize():
@@ -19,9 +20,17 @@ print("MT5 initialized successfully")
 symbol = "EURUSD"
 timeframe = mt5.TIMEFRAME_M15  # 15-minute candles
 
-# November 2025 data (Nov 1 - Nov 30, 2025)
-start_date = datetime(2025, 11, 1)
-end_date = datetime(2025, 11, 30, 23, 59, 59)
+# Month files used by backtest_all_months.py (start, end)
+ranges = [
+    (datetime(2025, 9, 1), datetime(2025, 9, 30, 23, 59, 59)),
+    (datetime(2025, 10, 1), datetime(2025, 10, 31, 23, 59, 59)),
+    (datetime(2025, 11, 1), datetime(2025, 11, 30, 23, 59, 59)),
+    (datetime(2025, 12, 5), datetime(2026, 1, 4, 23, 59, 59)),
+]
+
+# One download covering every range, split locally afterwards
+start_date = min(start for start, _ in ranges)
+end_date = max(end for _, end in ranges)
 
 print(f"\nDownloading {symbol} M15 data...")
 print(f"From: {start_date}")
@@ -35,21 +44,29 @@ if rates is None:
     mt5.shutdown()
     exit()
 
-# Convert to DataFrame
-df = pd.DataFrame(rates)
-df['time'] = pd.to_datetime(df['time'], unit='s')
+# Keep MT5's structured array (time = epoch seconds) and split it directly
+times = rates['time']
 
-print(f"\nData downloaded: {len(df)} candles")
-print(f"Time range: {df['time'].min()} to {df['time'].max()}")
+print(f"\nData downloaded: {len(rates)} candles")
+print(f"Time range: {np.datetime64(int(times.min()), 's')} to {np.datetime64(int(times.max()), 's')}")
 
-# Save to CSV
+# Save one CSV per range (plus the raw .npy and a Feather copy, as data_collector does)
 output_dir = "data/raw"
 os.makedirs(output_dir, exist_ok=True)
 
-filename = f"{output_dir}/{symbol}_M15_{start_date.strftime('%Y-%m-%d')}_{end_date.strftime('%Y-%m-%d')}.csv"
-df.to_csv(filename, index=False)
+for start, end in ranges:
+    lo = np.datetime64(start, 's').astype(np.int64)
+    hi = np.datetime64(end, 's').astype(np.int64)
+    month_rates = rates[(times >= lo) & (times <= hi)]
+
+    filename = f"{output_dir}/{symbol}_M15_{start.strftime('%Y-%m-%d')}_{end.strftime('%Y-%m-%d')}.csv"
+    np.save(os.path.splitext(filename)[0] + '.npy', month_rates)
+
+    month_df = rates_to_frame(month_rates)
+    month_df.to_csv(filename, index=False)
+    save_feather(month_df, filename)
 
-print(f"\nSaved to: {filename}")
+    print(f"\nSaved {len(month_df)} candles to: {filename}")
 
 # Shutdown MT5
 mt5.shutdown()
@@ -3,6 +3,8 @@ High-Impact News Filter
 Blocks trading around major economic news events
 """
 
+import bisect
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import requests
@@ -10,6 +12,10 @@ from bs4 import BeautifulSoup
 import time
 
 
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_DAY = 86400 * 10**9
+
+
 class NewsFilter:
     """Filter trades around high-impact news events"""
 
@@ -21,7 +27,62 @@ class NewsFilter:
         """
         self.buffer_before = buffer_minutes_before
         self.buffer_after = buffer_minutes_after
-        self.news_events = []  # List of (datetime, event_name)
+        self._news_events = []  # List of (datetime, event_name), see news_events
+
+        # Sorted lookup index over news_events, rebuilt lazily after loads
+        self._index_dirty = True
+        self._times_ns = np.empty(0, dtype='int64')  # Event times as epoch nanoseconds, sorted
+        self._names = np.empty(0, dtype=object)      # Event names, parallel to _times_ns
+        self._order = np.empty(0, dtype='int64')     # Load order, parallel to _times_ns
+        self._fomc_nfp_days = frozenset()  # Epoch day numbers blocked entirely (FOMC/NFP)
+        self._day_labels = {}  # Epoch day number -> blackout label
+        self._sorted_events = []  # news_events sorted by time (ties keep load order)
+        self._sorted_times = []   # Event datetimes, parallel to _sorted_events
+
+        # Memoized lookups: (epoch ns, buffer_before, buffer_after) -> result
+        # (candle timestamps repeat across calls; plain dict so the filter pickles)
+        self._lookup_cache = {}
+
+    @property
+    def news_events(self):
+        """
+        Loaded (datetime, event_name) events, read-only - add events with
+        load_custom_news / load_hardcoded_news so the lookup index stays current
+        """
+        return tuple(self._news_events)
+
+    @news_events.setter
+    def news_events(self, events):
+        self._news_events = list(events)
+        self._invalidate_index()
+
+    def _invalidate_index(self):
+        """Mark the event index stale and drop memoized lookups"""
+        self._index_dirty = True
+        self._lookup_cache.clear()
+
+    def _rebuild_index(self):
+        """Build the sorted event index used by is_news_time"""
+        times = np.array([t for t, _ in self._news_events], dtype='datetime64[ns]').astype('int64')
+        order = np.argsort(times, kind='stable')
+        self._times_ns = times[order]
+        self._names = np.array([name for _, name in self._news_events], dtype=object)[order]
+        self._order = order
+
+        # First matching event (in load order) labels the whole-day block
+        self._day_labels = {}
+        for day, (_, event_name) in zip(times // NS_PER_DAY, self._news_events):
+            if 'FOMC' in event_name:
+                self._day_labels.setdefault(int(day), f"FOMC_DAY_{event_name}")
+            elif 'NFP' in event_name or 'Non-Farm Employment Change' in event_name:
+                self._day_labels.setdefault(int(day), f"NFP_DAY_{event_name}")
+        self._fomc_nfp_days = frozenset(self._day_labels)
+
+        # Sorted copy for bisect in get_next_news / get_news_in_range
+        self._sorted_events = sorted(self._news_events, key=lambda x: x[0])
+        self._sorted_times = [t for t, _ in self._sorted_events]
+
+        self._index_dirty = False
 
     def load_hardcoded_news(self, year=2025):
         """
@@ -53,7 +114,8 @@ class NewsFilter:
             fomc_date = datetime(year, month, 15, 19, 0)
             news.append((fomc_date, "FOMC"))
 
-        self.news_events.extend(news)
+        self._news_events.extend(news)
+        self._invalidate_index()
         return len(news)
 
     def scrape_forexfactory(self, start_date, end_date):
@@ -83,38 +145,89 @@ class NewsFilter:
             (is_blackout, event_name or None)
         """
         if isinstance(timestamp, pd.Timestamp):
-            timestamp = timestamp.to_pydatetime()
+            return self.is_news_time_ns(timestamp.value)
+
+        return self.is_news_time_ns(np.datetime64(timestamp, 'ns').astype('int64'))
+
+    def is_news_time_ns(self, ts_ns):
+        """is_news_time for a timestamp given as int64 epoch nanoseconds"""
+        key = (int(ts_ns), self.buffer_before, self.buffer_after)
+        result = self._lookup_cache.get(key)
+        if result is None:
+            if len(self._lookup_cache) >= 4096:
+                self._lookup_cache.clear()  # Bound the memo like the old LRU size
+            result = self._lookup_cache[key] = self._lookup_epoch(key[0])
+        return result
+
+    def _lookup_epoch(self, ts):
+        """is_news_time for a timestamp given as epoch nanoseconds"""
+        if self._index_dirty:
+            self._rebuild_index()
 
         # Check if it's FOMC day or NFP day - block entire day
-        current_date = timestamp.date()
-        for news_time, event_name in self.news_events:
-            if 'FOMC' in event_name and news_time.date() == current_date:
-                return True, f"FOMC_DAY_{event_name}"
-            if 'NFP' in event_name or 'Non-Farm Employment Change' in event_name:
-                if news_time.date() == current_date:
-                    return True, f"NFP_DAY_{event_name}"
-
-        # Regular news buffer check
-        for news_time, event_name in self.news_events:
-            # Check if within buffer zone
-            time_diff = (timestamp - news_time).total_seconds() / 60  # minutes
-
-            # Before news: -buffer_before to 0
-            # After news: 0 to +buffer_after
-            if -self.buffer_before <= time_diff <= self.buffer_after:
-                return True, event_name
+        day = ts // NS_PER_DAY
+        if day in self._fomc_nfp_days:
+            return True, self._day_labels[day]
+
+        # Regular news buffer check: events within [ts - buffer_after, ts + buffer_before]
+        lo = np.searchsorted(self._times_ns, ts - self.buffer_after * NS_PER_MINUTE, side='left')
+        hi = np.searchsorted(self._times_ns, ts + self.buffer_before * NS_PER_MINUTE, side='right')
+        if lo < hi:
+            # Report the earliest-loaded event when several windows overlap
+            first = lo + np.argmin(self._order[lo:hi])
+            return True, self._names[first]
 
         return False, None
 
+    def news_mask(self, times):
+        """
+        Vectorized is_news_time over a whole candle timeline
+
+        Args:
+            times: Array-like of candle timestamps (e.g. df['time'])
+
+        Returns:
+            (mask, name_idx, labels): mask[i] is True where is_news_time would
+            block candle i, and labels[name_idx[i]] is the event it reports
+            (name_idx is -1 where mask is False)
+        """
+        if self._index_dirty:
+            self._rebuild_index()
+
+        times_ns = np.asarray(times, dtype='datetime64[ns]').astype('int64')
+        name_idx = np.full(len(times_ns), -1, dtype=np.int16)
+
+        # Each window is a contiguous run of the time-sorted candles (searchsorted bounds)
+        order = np.argsort(times_ns, kind='stable')
+        sorted_ns = times_ns[order]
+
+        # Buffer windows, latest-loaded first so the earliest-loaded event wins overlaps
+        labels = [name for _, name in self._news_events]
+        event_ns = self._times_ns[np.argsort(self._order)]  # Back in load order
+        starts = np.searchsorted(sorted_ns, event_ns - self.buffer_before * NS_PER_MINUTE, 'left')
+        ends = np.searchsorted(sorted_ns, event_ns + self.buffer_after * NS_PER_MINUTE, 'right')
+        for k in range(len(labels) - 1, -1, -1):
+            name_idx[order[starts[k]:ends[k]]] = k
+
+        # FOMC/NFP days are blocked entirely and take precedence
+        for day, label in self._day_labels.items():
+            start, end = np.searchsorted(sorted_ns, [day * NS_PER_DAY, (day + 1) * NS_PER_DAY], 'left')
+            name_idx[order[start:end]] = len(labels)
+            labels.append(label)
+
+        return name_idx >= 0, name_idx, labels
+
     def get_next_news(self, current_time):
         """Get next upcoming news event"""
         if isinstance(current_time, pd.Timestamp):
             current_time = current_time.to_pydatetime()
 
-        upcoming = [(t, name) for t, name in self.news_events if t > current_time]
-        if upcoming:
-            upcoming.sort(key=lambda x: x[0])
-            return upcoming[0]
+        if self._index_dirty:
+            self._rebuild_index()
+
+        i = bisect.bisect_right(self._sorted_times, current_time)
+        if i < len(self._sorted_events):
+            return self._sorted_events[i]
         return None, None
 
     def get_news_in_range(self, start_date, end_date):
@@ -124,10 +237,12 @@ class NewsFilter:
         if isinstance(end_date, pd.Timestamp):
             end_date = end_date.to_pydatetime()
 
-        events = [(t, name) for t, name in self.news_events
-                  if start_date <= t <= end_date]
-        events.sort(key=lambda x: x[0])
-        return events
+        if self._index_dirty:
+            self._rebuild_index()
+
+        lo = bisect.bisect_left(self._sorted_times, start_date)
+        hi = bisect.bisect_right(self._sorted_times, end_date)
+        return self._sorted_events[lo:hi]
 
     def load_custom_news(self, news_list):
         """
@@ -136,11 +251,13 @@ class NewsFilter:
         Args:
             news_list: List of tuples (datetime, event_name)
         """
-        self.news_events.extend(news_list)
+        self._news_events.extend(news_list)
+        self._invalidate_index()
 
     def clear_news(self):
         """Clear all loaded news events"""
-        self.news_events = []
+        self._news_events = []
+        self._invalidate_index()
 
 
 # Specific high-impact news for November 2025
@@ -15,8 +15,37 @@ Key Concepts:
 - Scalp: 5 pip TP, 0.01% risk per trade
 """
 
+import logging
+from collections import namedtuple
+from datetime import date
+import numpy as np
 import pandas as pd
 from news_filter import NewsFilter
+from news_filter import NS_PER_DAY, NS_PER_MINUTE
+from _backtest_loop import (_is_swing_high, _is_swing_low, _last_true_before,
+                            _true_range_series, _adx_series, _atr_series,
+                            _trailing_mean, _volatility_spike, run_strategy,
+                            SIGNAL_DAILY_RESET, SIGNAL_BIAS_CHANGE, SIGNAL_ENTRY,
+                            BIAS_NONE, BIAS_LONG, BIAS_SHORT,
+                            DAILY_RESET, END_OF_DAY, NEWS)
+
+
+logger = logging.getLogger(__name__)
+
+_EPOCH_DATE = date(1970, 1, 1)
+
+# OHLC of a single candle, read from column arrays (no pandas Series)
+CandleOHLC = namedtuple('CandleOHLC', ['open', 'high', 'low', 'close'])
+
+
+# Bias / signal codes -> names
+BIAS_NAMES = {BIAS_NONE: None, BIAS_LONG: 'LONG', BIAS_SHORT: 'SHORT'}
+BIAS_CODES = {name: code for code, name in BIAS_NAMES.items()}
+SIGNAL_TYPES = ('DAILY_RESET', 'BIAS_CHANGE', 'ENTRY')
+
+# Object-array lookups for the signal table (built once, indexed per call)
+_SIGNAL_TYPE_LABELS = np.array(SIGNAL_TYPES, dtype=object)
+_DIRECTION_LABELS = np.array(['SHORT', 'LONG'], dtype=object)  # by is_long
 
 
 class TrendFollowingStrategy:
@@ -24,11 +53,16 @@ class TrendFollowingStrategy:
     Swing-based trend following strategy with daily reset
     """
 
+    # Bias codes stored in bias_code (bias gives the 'LONG'/'SHORT' name)
+    LONG = BIAS_LONG
+    SHORT = BIAS_SHORT
+    NONE = BIAS_NONE
+
     def __init__(self, individual_tp_pips=5, risk_per_trade=0.0001,
                  max_stop_loss_percent=0.035, trading_hours=(13, 20),
                  analysis_hours=(12, 13), swing_lookback=2,
                  enable_news_filter=True, news_buffer_before=15,
-                 news_buffer_after=30):
+                 news_buffer_after=30, symbol="EURUSD"):
         """
         Args:
             individual_tp_pips: TP in pips for each individual position (scalp)
@@ -40,6 +74,7 @@ class TrendFollowingStrategy:
             enable_news_filter: Enable/disable news filter
             news_buffer_before: Minutes before news to stop trading
             news_buffer_after: Minutes after news to stop trading
+            symbol: Traded symbol (sets pip size for position sizing, see set_symbol)
         """
         self.individual_tp_pips = individual_tp_pips
         self.risk_per_trade = risk_per_trade
@@ -48,6 +83,7 @@ class TrendFollowingStrategy:
         self.analysis_hours = analysis_hours
         self.swing_lookback = swing_lookback
         self.enable_news_filter = enable_news_filter
+        self.set_symbol(symbol)
 
         # Initialize news filter
         if self.enable_news_filter:
@@ -69,7 +105,7 @@ class TrendFollowingStrategy:
             self.news_filter = None
 
         # State variables
-        self.bias = 'LONG'  # Start with LONG, will adjust during analysis
+        self.bias_code = self.LONG  # Start with LONG, will adjust during analysis
         self.mitigation_high = None
         self.mitigation_low = None
         self.mitigation_candle_idx = None
@@ -80,9 +116,11 @@ class TrendFollowingStrategy:
         self.reference_high_idx = None
         self.reference_low_idx = None
 
-        # Pending swing highs/lows (not yet confirmed)
-        self.pending_swing_highs = []  # [(price, index), ...]
-        self.pending_swing_lows = []   # [(price, index), ...]
+        # Pending swing highs/lows (not yet confirmed): only the extremes are ever used
+        self.pending_swing_high = None  # (price, index) of the highest pending high (first wins ties)
+        self.pending_swing_low = None   # (price, index) of the lowest pending low (first wins ties)
+        self._pending_high_last_idx = None  # Last pending swing indices (duplicate check)
+        self._pending_low_last_idx = None
 
         # Track mitigation test for entry
         self.mitigation_tested = False  # Has price entered mitigation zone after bias change?
@@ -90,18 +128,32 @@ class TrendFollowingStrategy:
         self.entry_candle_count = 0  # Count candles since ready_to_trade
         self.last_bias_change_idx = None  # Track when bias last changed
 
-        # Last analysis day tracking
+        # Last analysis day tracking (date, and as an epoch day number for candle_arrays['day'])
         self.last_analysis_day = None
+        self._last_day_id = None
+
+        # Column arrays of the DataFrame being processed (see candle_arrays)
+        self._arrays_df = None
+        self._arrays = None
 
 
-    def is_bullish_candle(self, row):
-        """Check if candle is bullish (green)"""
-        return row['close'] > row['open']
+    @property
+    def bias(self):
+        """Current bias as 'LONG' / 'SHORT' (None if unset)"""
+        return BIAS_NAMES[self.bias_code]
 
+    @bias.setter
+    def bias(self, name):
+        self.bias_code = BIAS_CODES[name]
 
-    def is_bearish_candle(self, row):
-        """Check if candle is bearish (red)"""
-        return row['close'] < row['open']
+    def is_bullish_candle(self, df, idx):
+        """Check if candle at idx is bullish (green)"""
+        return self.candle_arrays(df)['is_green'][idx]
+
+
+    def is_bearish_candle(self, df, idx):
+        """Check if candle at idx is bearish (red)"""
+        return self.candle_arrays(df)['is_red'][idx]
 
 
     def is_swing_high(self, df, idx):
@@ -109,22 +161,7 @@ class TrendFollowingStrategy:
         Check if candle at idx is a swing high (left 2 right 2)
         Returns True if the HIGH at idx is greater than all surrounding candles
         """
-        if idx < self.swing_lookback or idx >= len(df) - self.swing_lookback:
-            return False
-
-        center_high = df.iloc[idx]['high']
-
-        # Check left candles
-        for i in range(idx - self.swing_lookback, idx):
-            if df.iloc[i]['high'] >= center_high:
-                return False
-
-        # Check right candles
-        for i in range(idx + 1, idx + self.swing_lookback + 1):
-            if df.iloc[i]['high'] >= center_high:
-                return False
-
-        return True
+        return _is_swing_high(self.candle_arrays(df)['high'], idx, self.swing_lookback)
 
 
     def is_swing_low(self, df, idx):
@@ -132,22 +169,66 @@ class TrendFollowingStrategy:
         Check if candle at idx is a swing low (left 2 right 2)
         Returns True if the LOW at idx is lower than all surrounding candles
         """
-        if idx < self.swing_lookback or idx >= len(df) - self.swing_lookback:
-            return False
+        return _is_swing_low(self.candle_arrays(df)['low'], idx, self.swing_lookback)
 
-        center_low = df.iloc[idx]['low']
 
-        # Check left candles
-        for i in range(idx - self.swing_lookback, idx):
-            if df.iloc[i]['low'] <= center_low:
-                return False
+    def swing_flags(self, df):
+        """
+        is_swing_high / is_swing_low for every candle in one vectorized pass
 
-        # Check right candles
-        for i in range(idx + 1, idx + self.swing_lookback + 1):
-            if df.iloc[i]['low'] <= center_low:
-                return False
+        A candle is a swing high if its HIGH is strictly greater than the max of
+        the `swing_lookback` candles on each side (swing low: LOW strictly lower
+        than the min). Edge candles without a full window compare against NaN
+        and are never swings, same as the per-candle checks.
 
-        return True
+        Returns:
+            (swing_high, swing_low) boolean NumPy arrays (cached per df)
+        """
+        k = self.swing_lookback
+        arrays = self.candle_arrays(df)
+        key = ('swing_flags', k)
+        if key in arrays:
+            return arrays[key]
+
+        high = df['high']
+        low = df['low']
+
+        # Neighbour extremes: [i-k, i-1] via shift(1), [i+1, i+k] via shift(-k)
+        rolling_high = high.rolling(k).max()
+        rolling_low = low.rolling(k).min()
+        swing_high = (high > rolling_high.shift(1)) & (high > rolling_high.shift(-k))
+        swing_low = (low < rolling_low.shift(1)) & (low < rolling_low.shift(-k))
+
+        arrays[key] = (swing_high.to_numpy(), swing_low.to_numpy())
+        return arrays[key]
+
+
+    def candle_arrays(self, df):
+        """
+        OHLC NumPy arrays and red/green masks for df, extracted once per DataFrame
+        and reused by every per-candle call with the same df
+        """
+        if self._arrays_df is not df:
+            open_ = df['open'].to_numpy()
+            close = df['close'].to_numpy()
+            times_ns = _times_ns(df)
+            minute_of_day = (times_ns % NS_PER_DAY) // NS_PER_MINUTE
+            self._arrays = {
+                'open': open_,
+                'high': df['high'].to_numpy(),
+                'low': df['low'].to_numpy(),
+                'close': close,
+                'is_red': close < open_,
+                'is_green': close > open_,
+                # Calendar fields from the epoch ns times (no .dt accessors)
+                'hour': (minute_of_day // 60).astype(np.int8),
+                'minute_of_day': minute_of_day,
+                'day': times_ns // NS_PER_DAY,  # Epoch day number
+            }
+            self._arrays['last_red_before'] = _last_true_before(self._arrays['is_red'])
+            self._arrays['last_green_before'] = _last_true_before(self._arrays['is_green'])
+            self._arrays_df = df
+        return self._arrays
 
 
     def find_last_counter_candle_before_index(self, df, before_idx, candle_type):
@@ -159,24 +240,43 @@ class TrendFollowingStrategy:
             candle_type: 'red' or 'green'
 
         Returns:
-            (candle_data, index) or (None, None)
+            (CandleOHLC, index) or (None, None)
         """
-        search_start = max(0, before_idx - 100)  # Look back max 100 candles
+        idx = self.last_counter_candle_idx(df, before_idx, candle_type)
+        if idx < 0:
+            return None, None
+
+        arrays = self.candle_arrays(df)
+        return CandleOHLC(arrays['open'][idx], arrays['high'][idx],
+                          arrays['low'][idx], arrays['close'][idx]), idx
 
-        for i in range(before_idx - 1, search_start - 1, -1):
-            candle = df.iloc[i]
 
-            if candle_type == 'red' and self.is_bearish_candle(candle):
-                return candle, i
-            elif candle_type == 'green' and self.is_bullish_candle(candle):
-                return candle, i
+    def last_counter_candle_idx(self, df, before_idx, candle_type):
+        """
+        Index of the last 'red' / 'green' candle before before_idx
+        (at most 100 candles back), or -1 - an O(1) pointer lookup
+        """
+        arrays = self.candle_arrays(df)
+        last_before = (arrays['last_green_before'] if candle_type == 'green'
+                       else arrays['last_red_before'])
 
-        return None, None
+        # Look back max 100 candles
+        idx = int(last_before[before_idx])
+        if idx < before_idx - 100:
+            return -1
+        return idx
+
+
+    def _set_mitigation(self, arrays, idx):
+        """Mitigation zone = high/low of candle idx"""
+        self.mitigation_high = arrays['high'][idx]
+        self.mitigation_low = arrays['low'][idx]
+        self.mitigation_candle_idx = idx
 
 
     def reset_daily_state(self):
         """Reset state for new trading day"""
-        self.bias = 'LONG'
+        self.bias_code = self.LONG
         self.mitigation_high = None
         self.mitigation_low = None
         self.mitigation_candle_idx = None
@@ -184,14 +284,56 @@ class TrendFollowingStrategy:
         self.reference_low = None
         self.reference_high_idx = None
         self.reference_low_idx = None
-        self.pending_swing_highs = []
-        self.pending_swing_lows = []
+        self.pending_swing_high = None
+        self.pending_swing_low = None
+        self._pending_high_last_idx = None
+        self._pending_low_last_idx = None
         self.mitigation_tested = False
         self.ready_to_trade = False
         self.entry_candle_count = 0
         self.last_bias_change_idx = None
 
 
+    def reset_full_state(self):
+        """Reset all state for a new backtest run (parameters and news filter are kept)"""
+        self.reset_daily_state()
+        self.last_analysis_day = None
+        self._last_day_id = None
+        self._arrays_df = None
+        self._arrays = None
+
+
+    def _load_kernel_state(self, final, pending):
+        """Adopt the final state returned by _backtest_loop.run_strategy"""
+        (bias, mitigation_high, mitigation_low, mitigation_candle_idx,
+         reference_high, reference_low, reference_high_idx, reference_low_idx,
+         last_bias_change_idx, last_day) = final
+        high_price, high_idx, high_last_idx, low_price, low_idx, low_last_idx = pending
+
+        def level(value):
+            return None if np.isnan(value) else value
+
+        def index(value):
+            return None if value < 0 else int(value)
+
+        self.bias_code = int(bias)
+        self.mitigation_high = level(mitigation_high)
+        self.mitigation_low = level(mitigation_low)
+        self.mitigation_candle_idx = index(mitigation_candle_idx)
+        self.reference_high = level(reference_high)
+        self.reference_low = level(reference_low)
+        self.reference_high_idx = index(reference_high_idx)
+        self.reference_low_idx = index(reference_low_idx)
+        self.last_bias_change_idx = index(last_bias_change_idx)
+        self.pending_swing_high = None if high_idx < 0 else (high_price, int(high_idx))
+        self.pending_swing_low = None if low_idx < 0 else (low_price, int(low_idx))
+        self._pending_high_last_idx = index(high_last_idx)
+        self._pending_low_last_idx = index(low_last_idx)
+        if last_day != np.iinfo(np.int64).min:
+            self.last_analysis_day = np.datetime64(int(last_day), 'D').astype(object)
+            self._last_day_id = int(last_day)
+
+
     def is_analysis_period(self, timestamp):
         """Check if current time is in analysis period (12:00-13:00)"""
         hour = timestamp.hour
@@ -203,68 +345,25 @@ class TrendFollowingStrategy:
         Calculate ADX (Average Directional Index)
         ADX < 25 = weak trend / ranging market
         ADX > 25 = strong trend
+        (simplified: DX of the last `period` candles, see _backtest_loop._adx)
         """
-        if current_idx < period + 1:
-            return 50  # Default to "trending" if not enough data
-
-        # Get recent candles
-        start_idx = max(0, current_idx - period - 1)
-        candles = df.iloc[start_idx:current_idx + 1]
-
-        # Calculate True Range (TR)
-        high = candles['high'].values
-        low = candles['low'].values
-        close = candles['close'].values
-
-        tr = []
-        for i in range(1, len(candles)):
-            h_l = high[i] - low[i]
-            h_pc = abs(high[i] - close[i-1])
-            l_pc = abs(low[i] - close[i-1])
-            tr.append(max(h_l, h_pc, l_pc))
-
-        # Calculate +DM and -DM
-        plus_dm = []
-        minus_dm = []
-        for i in range(1, len(candles)):
-            up_move = high[i] - high[i-1]
-            down_move = low[i-1] - low[i]
-
-            if up_move > down_move and up_move > 0:
-                plus_dm.append(up_move)
-            else:
-                plus_dm.append(0)
+        return self.indicator_series(df, 'adx', period)[current_idx]
 
-            if down_move > up_move and down_move > 0:
-                minus_dm.append(down_move)
+    def indicator_series(self, df, name, period=14):
+        """
+        calculate_adx / calculate_atr for every candle of df ('adx' / 'atr'),
+        computed once per df and period. Both share one true range series
+        """
+        arrays = self.candle_arrays(df)
+        key = (name, period)
+        if key not in arrays:
+            if 'tr' not in arrays:
+                arrays['tr'] = _true_range_series(arrays['high'], arrays['low'], arrays['close'])
+            if name == 'adx':
+                arrays[key] = _adx_series(arrays['tr'], arrays['high'], arrays['low'], period)
             else:
-                minus_dm.append(0)
-
-        # Smooth TR, +DM, -DM with EMA
-        if len(tr) < period:
-            return 50  # Not enough data
-
-        # Simple average for first period
-        atr = sum(tr[-period:]) / period
-        plus_di_smoothed = sum(plus_dm[-period:]) / period
-        minus_di_smoothed = sum(minus_dm[-period:]) / period
-
-        # Calculate +DI and -DI
-        if atr == 0:
-            return 0  # No movement = ranging
-
-        plus_di = 100 * (plus_di_smoothed / atr)
-        minus_di = 100 * (minus_di_smoothed / atr)
-
-        # Calculate DX
-        di_sum = plus_di + minus_di
-        if di_sum == 0:
-            return 0
-
-        dx = 100 * abs(plus_di - minus_di) / di_sum
-
-        # ADX is smoothed DX (simplified: using DX directly for now)
-        return dx
+                arrays[key] = _atr_series(arrays['tr'], period)
+        return arrays[key]
 
     def is_choppy_market(self, current_time, df=None, current_idx=None):
         """
@@ -281,30 +380,15 @@ class TrendFollowingStrategy:
 
     def calculate_atr(self, df, current_idx, period=14):
         """Calculate Average True Range (ATR) for volatility"""
-        if current_idx < period:
-            return 0.0003  # Default ATR value
-
-        # Get recent candles
-        start_idx = max(0, current_idx - period)
-        candles = df.iloc[start_idx:current_idx + 1]
-
-        high = candles['high'].values
-        low = candles['low'].values
-        close = candles['close'].values
-
-        # Calculate True Range
-        tr = []
-        for i in range(1, len(candles)):
-            h_l = high[i] - low[i]
-            h_pc = abs(high[i] - close[i-1])
-            l_pc = abs(low[i] - close[i-1])
-            tr.append(max(h_l, h_pc, l_pc))
-
-        # ATR is average of TR
-        if len(tr) >= period:
-            return sum(tr[-period:]) / period
-        else:
-            return sum(tr) / len(tr) if tr else 0.0003
+        return self.indicator_series(df, 'atr', period)[current_idx]
+
+    def average_atr(self, df, current_idx, window=50):
+        """Mean 14-period ATR of the `window` candles before current_idx (0.0003 if too early)"""
+        arrays = self.candle_arrays(df)
+        key = ('avg_atr', window)
+        if key not in arrays:
+            arrays[key] = _trailing_mean(self.indicator_series(df, 'atr', 14), window, 0.0003)
+        return arrays[key][current_idx]
 
     def get_dynamic_tp_atr(self, df, current_idx):
         """
@@ -316,14 +400,7 @@ class TrendFollowingStrategy:
         atr = self.calculate_atr(df, current_idx, period=14)
 
         # Calculate average ATR from last 50 candles
-        start_idx = max(0, current_idx - 50)
-        avg_atr = 0.0003  # Default
-
-        if current_idx >= 50:
-            atr_values = []
-            for i in range(start_idx, current_idx):
-                atr_values.append(self.calculate_atr(df, i, period=14))
-            avg_atr = sum(atr_values) / len(atr_values)
+        avg_atr = self.average_atr(df, current_idx, window=50)
 
         # Dynamic TP based on current ATR vs average
         if atr > avg_atr * 1.1:  # High volatility
@@ -341,13 +418,7 @@ class TrendFollowingStrategy:
         atr = self.calculate_atr(df, current_idx, period=14)
 
         # Calculate average ATR
-        start_idx = max(0, current_idx - 50)
-        avg_atr = 0.0003
-        if current_idx >= 50:
-            atr_values = []
-            for i in range(start_idx, current_idx):
-                atr_values.append(self.calculate_atr(df, i, period=14))
-            avg_atr = sum(atr_values) / len(atr_values)
+        avg_atr = self.average_atr(df, current_idx, window=50)
 
         # Start with base TP
         base_tp = 22  # Middle ground
@@ -387,25 +458,19 @@ class TrendFollowingStrategy:
         Check if there was high volatility in recent candles
         High volatility = any candle in last 4 candles with 2x+ average range
         """
-        if current_idx < lookback + 14:
-            return False
+        return bool(self.volatility_spike_flags(df, lookback)[current_idx])
 
-        # Calculate average ATR from last 20 candles
-        atr_sum = 0
-        for i in range(current_idx - 20, current_idx):
-            candle = df.iloc[i]
-            candle_range = candle['high'] - candle['low']
-            atr_sum += candle_range
-        avg_range = atr_sum / 20
-
-        # Check last 4 candles for volatility spike (2x threshold)
-        for i in range(current_idx - lookback, current_idx):
-            candle = df.iloc[i]
-            candle_range = candle['high'] - candle['low']
-            if candle_range > avg_range * 2:
-                return True  # Extreme volatility detected in recent candles
 
-        return False
+    def volatility_spike_flags(self, df, lookback=4):
+        """
+        is_high_volatility_recent for every candle of df at once
+        (one compiled pass, cached per df and lookback)
+        """
+        arrays = self.candle_arrays(df)
+        key = ('volatility_spike', lookback)
+        if key not in arrays:
+            arrays[key] = _volatility_spike(arrays['high'], arrays['low'], lookback)
+        return arrays[key]
 
     def is_trading_hours(self, timestamp, df=None, current_idx=None):
         """
@@ -431,144 +496,217 @@ class TrendFollowingStrategy:
             if is_news:
                 return False  # Block trading during news
 
-        # Check choppy market filter (ADX-based, threshold 25)
         if df is not None and current_idx is not None:
-            if self.is_choppy_market(timestamp, df, current_idx):
-                return False  # Block trading during choppy conditions
+            return self.passes_market_filters(timestamp, df, current_idx)
+
+        return True
+
+
+    def passes_market_filters(self, timestamp, df, current_idx):
+        """The ADX (choppy) and ATR (volatility) part of is_trading_hours"""
+        # Check choppy market filter (ADX-based, threshold 25)
+        if self.is_choppy_market(timestamp, df, current_idx):
+            return False  # Block trading during choppy conditions
 
         # Check recent high volatility filter (ATR-based)
-        if df is not None and current_idx is not None:
-            if self.is_high_volatility_recent(df, current_idx, lookback=4):
-                return False  # Block trading after volatility spike
+        if self.is_high_volatility_recent(df, current_idx, lookback=4):
+            return False  # Block trading after volatility spike
 
         return True
 
 
-    def should_close_all_positions(self, timestamp):
-        """Check if it's time to close all positions (20:00)"""
-        return timestamp.hour >= self.trading_hours[1]
+    def market_filters_mask(self, df):
+        """passes_market_filters for every candle of df at once"""
+        choppy = self.indicator_series(df, 'adx', 14) < 30
+        return ~choppy & ~self.volatility_spike_flags(df, lookback=4)
+
+
+    def trading_hours_mask(self, df, news_mask=None):
+        """
+        is_trading_hours(timestamp) for every candle of df at once
+        (time window + news filter; combine with passes_market_filters for the
+        ADX/ATR filters that is_trading_hours applies when given df and current_idx)
+
+        Args:
+            news_mask: Optional precomputed NewsFilter.news_mask(df['time'])[0]
+        """
+        minutes = self.candle_arrays(df)['minute_of_day']
+
+        # Basic trading hours, no new entries after 19:55
+        mask = (self.trading_hours[0] * 60 <= minutes) & (minutes < self.trading_hours[1] * 60)
+        mask &= ~((19 * 60 + 55 <= minutes) & (minutes < 20 * 60))
+
+        if self.enable_news_filter and self.news_filter:
+            if news_mask is None:
+                news_mask, _, _ = self.news_filter.news_mask(df['time'])
+            mask &= ~news_mask
+
+        return mask
+
+
+    def should_close_all_positions(self, timestamp, df=None, current_idx=None):
+        """
+        Check if it's time to close all positions (20:00)
+        (hour read from candle_arrays when df and current_idx are given)
+        """
+        if df is not None and current_idx is not None:
+            hour = self.candle_arrays(df)['hour'][current_idx]
+        else:
+            hour = timestamp.hour
+        return hour >= self.trading_hours[1]
 
 
-    def check_daily_reset(self, timestamp):
+    def check_daily_reset(self, timestamp, df=None, current_idx=None):
         """
         Check if we need to reset for a new day
+        (hour read from candle_arrays when df and current_idx are given)
         Returns True if reset happened
         """
-        current_day = timestamp.date()
+        # Array path: hour and epoch day lookups (the date is only built on a reset)
+        if df is not None and current_idx is not None:
+            arrays = self.candle_arrays(df)
+            hour = arrays['hour'][current_idx]
+            if not (self.analysis_hours[0] <= hour < self.analysis_hours[1]):
+                return False
+
+            day_id = int(arrays['day'][current_idx])
+            if day_id == self._last_day_id:
+                return False
+
+            self.reset_daily_state()
+            self.last_analysis_day = timestamp.date()
+            self._last_day_id = day_id
+            return True
 
         # If it's a new day and we're in analysis period
-        if self.last_analysis_day != current_day and self.is_analysis_period(timestamp):
+        if not self.is_analysis_period(timestamp):
+            return False
+
+        current_day = timestamp.date()
+        if self.last_analysis_day != current_day:
             self.reset_daily_state()
             self.last_analysis_day = current_day
+            self._last_day_id = (current_day - _EPOCH_DATE).days
             return True
 
         return False
 
 
-    def update_swing_levels(self, df, current_idx):
+    def update_swing_levels(self, df, current_idx, swing_high=None, swing_low=None):
         """
         Update swing high/low tracking
         Check for new swings and confirm pending ones
 
         ONLY during analysis period (12:00-13:00) and trading hours (13:00-20:00)
+
+        Args:
+            swing_high, swing_low: Optional precomputed arrays from swing_flags(df)
+                                   (otherwise the cached swing_flags(df) are used)
         """
-        candle = df.iloc[current_idx]
+        arrays = self.candle_arrays(df)
 
         # Only update during analysis or trading hours
-        hour = candle['time'].hour
-        if not (self.analysis_hours[0] <= hour < self.trading_hours[1]):
-            return
+        if self._in_structure_hours(arrays, current_idx):
+            self._update_swing_levels(arrays, df, current_idx, swing_high, swing_low)
+
+
+    def _in_structure_hours(self, arrays, current_idx):
+        """Swings and bias only move during analysis or trading hours"""
+        hour = arrays['hour'][current_idx]
+        return self.analysis_hours[0] <= hour < self.trading_hours[1]
+
+
+    def _update_swing_levels(self, arrays, df, current_idx, swing_high, swing_low):
+        """update_swing_levels body (hour gate already checked)"""
+        if swing_high is None or swing_low is None:
+            swing_high, swing_low = self.swing_flags(df)
 
         # If we don't have initial references yet, initialize them with first swing
-        if self.reference_high is None and self.pending_swing_highs:
-            highest_swing = max(self.pending_swing_highs, key=lambda x: x[0])
-            self.reference_high = highest_swing[0]
-            self.reference_high_idx = highest_swing[1]
+        if self.reference_high is None and self.pending_swing_high is not None:
+            self.reference_high, self.reference_high_idx = self.pending_swing_high
 
-        if self.reference_low is None and self.pending_swing_lows:
-            lowest_swing = min(self.pending_swing_lows, key=lambda x: x[0])
-            self.reference_low = lowest_swing[0]
-            self.reference_low_idx = lowest_swing[1]
+        if self.reference_low is None and self.pending_swing_low is not None:
+            self.reference_low, self.reference_low_idx = self.pending_swing_low
 
         # Detect new swing high (need to wait 2 candles to confirm)
         if current_idx >= self.swing_lookback + 2:
             swing_idx = current_idx - self.swing_lookback
-            if self.is_swing_high(df, swing_idx):
-                swing_price = df.iloc[swing_idx]['high']
-                # Add to pending if not already there
-                if not any(idx == swing_idx for _, idx in self.pending_swing_highs):
-                    self.pending_swing_highs.append((swing_price, swing_idx))
+            if swing_high[swing_idx]:
+                swing_price = arrays['high'][swing_idx]
+                # Add to pending if not already there (added in index order)
+                best = self.pending_swing_high
+                if best is None or self._pending_high_last_idx != swing_idx:
+                    self._pending_high_last_idx = swing_idx
+                    if best is None or swing_price > best[0]:
+                        self.pending_swing_high = (swing_price, swing_idx)
 
         # Detect new swing low (need to wait 2 candles to confirm)
         if current_idx >= self.swing_lookback + 2:
             swing_idx = current_idx - self.swing_lookback
-            if self.is_swing_low(df, swing_idx):
-                swing_price = df.iloc[swing_idx]['low']
-                # Add to pending if not already there
-                if not any(idx == swing_idx for _, idx in self.pending_swing_lows):
-                    self.pending_swing_lows.append((swing_price, swing_idx))
+            if swing_low[swing_idx]:
+                swing_price = arrays['low'][swing_idx]
+                # Add to pending if not already there (added in index order)
+                best = self.pending_swing_low
+                if best is None or self._pending_low_last_idx != swing_idx:
+                    self._pending_low_last_idx = swing_idx
+                    if best is None or swing_price < best[0]:
+                        self.pending_swing_low = (swing_price, swing_idx)
 
         # Check if pending swing highs are confirmed (price broke reference low)
-        if self.reference_low is not None and self.pending_swing_highs:
+        if self.reference_low is not None and self.pending_swing_high is not None:
             # BREAK required: low must be LESS than reference_low (not equal)
-            if candle['low'] < self.reference_low:
-                # Find the highest pending swing high
-                highest_swing = max(self.pending_swing_highs, key=lambda x: x[0])
-                new_high = highest_swing[0]
-                new_high_idx = highest_swing[1]
+            if arrays['low'][current_idx] < self.reference_low:
+                # The highest pending swing high
+                new_high, new_high_idx = self.pending_swing_high
 
                 # Always update reference level to track market structure
                 old_ref_high = self.reference_high
                 self.reference_high = new_high
                 self.reference_high_idx = new_high_idx
-                self.pending_swing_highs = []  # Clear all pending
+                self.pending_swing_high = None  # Clear all pending
+                self._pending_high_last_idx = None
 
                 # LONG bias: Always update mitigation on any new swing high
-                if self.bias == 'LONG':
+                if self.bias_code == self.LONG:
                     self.update_mitigation_for_new_high(df, self.reference_high_idx)
 
         # Check if pending swing lows are confirmed (price broke reference high)
-        if self.reference_high is not None and self.pending_swing_lows:
+        if self.reference_high is not None and self.pending_swing_low is not None:
             # BREAK required: high must be GREATER than reference_high (not equal)
-            if candle['high'] > self.reference_high:
-                # Find the lowest pending swing low
-                lowest_swing = min(self.pending_swing_lows, key=lambda x: x[0])
-                new_low = lowest_swing[0]
-                new_low_idx = lowest_swing[1]
+            if arrays['high'][current_idx] > self.reference_high:
+                # The lowest pending swing low
+                new_low, new_low_idx = self.pending_swing_low
 
                 # Always update reference level to track market structure
                 old_ref_low = self.reference_low
                 self.reference_low = new_low
                 self.reference_low_idx = new_low_idx
-                self.pending_swing_lows = []  # Clear all pending
+                self.pending_swing_low = None  # Clear all pending
+                self._pending_low_last_idx = None
 
                 # SHORT bias: Always update mitigation on any new swing low
-                if self.bias == 'SHORT':
+                if self.bias_code == self.SHORT:
                     self.update_mitigation_for_new_low(df, self.reference_low_idx)
 
 
     def update_mitigation_for_new_high(self, df, high_idx):
         """Update mitigation when new reference high is confirmed"""
         # Find last RED candle before this high
-        last_red, last_red_idx = self.find_last_counter_candle_before_index(df, high_idx + 1, 'red')
+        last_red_idx = self.last_counter_candle_idx(df, high_idx + 1, 'red')
 
-        if last_red is not None:
+        if last_red_idx >= 0:
             # Update mitigation (no minimum distance check)
-            self.mitigation_high = last_red['high']
-            self.mitigation_low = last_red['low']
-            self.mitigation_candle_idx = last_red_idx
+            self._set_mitigation(self.candle_arrays(df), last_red_idx)
 
 
     def update_mitigation_for_new_low(self, df, low_idx):
         """Update mitigation when new reference low is confirmed"""
         # Find last GREEN candle before this low
-        last_green, last_green_idx = self.find_last_counter_candle_before_index(df, low_idx + 1, 'green')
+        last_green_idx = self.last_counter_candle_idx(df, low_idx + 1, 'green')
 
-        if last_green is not None:
+        if last_green_idx >= 0:
             # Update mitigation (no minimum distance check)
-            self.mitigation_high = last_green['high']
-            self.mitigation_low = last_green['low']
-            self.mitigation_candle_idx = last_green_idx
+            self._set_mitigation(self.candle_arrays(df), last_green_idx)
 
 
     def check_bias_change(self, df, current_idx):
@@ -582,57 +720,48 @@ class TrendFollowingStrategy:
 
         Returns: True if bias changed, False otherwise
         """
-        candle = df.iloc[current_idx]
+        arrays = self.candle_arrays(df)
 
-        if self.mitigation_high is None or self.mitigation_low is None:
+        # Only allow bias change during analysis or trading hours
+        if not self._in_structure_hours(arrays, current_idx):
             return False
 
-        # Only allow bias change during analysis or trading hours
-        hour = candle['time'].hour
-        if not (self.analysis_hours[0] <= hour < self.trading_hours[1]):
+        return self._check_bias_change(arrays, df, current_idx)
+
+
+    def _check_bias_change(self, arrays, df, current_idx):
+        """check_bias_change body (hour gate already checked)"""
+        if self.mitigation_high is None or self.mitigation_low is None:
             return False
 
+        close = arrays['close'][current_idx]
         changed = False
 
-        if self.bias == 'LONG':
+        if self.bias_code == self.LONG:
             # LONG bias changes if price CLOSES below mitigation LOW (BREAK, not equal)
-            if candle['close'] < self.mitigation_low:
+            if close < self.mitigation_low:
                 # Bias changes to SHORT
-                self.bias = 'SHORT'
+                self.bias_code = self.SHORT
 
                 # New mitigation = last green candle BEFORE the breaking candle (not including it)
-                last_green, last_green_idx = self.find_last_counter_candle_before_index(df, current_idx, 'green')
-
-                if last_green is not None:
-                    self.mitigation_high = last_green['high']
-                    self.mitigation_low = last_green['low']
-                    self.mitigation_candle_idx = last_green_idx
-                else:
-                    # Fallback: use current candle
-                    self.mitigation_high = candle['high']
-                    self.mitigation_low = candle['low']
-                    self.mitigation_candle_idx = current_idx
+                last_green_idx = self.last_counter_candle_idx(df, current_idx, 'green')
+                if last_green_idx < 0:
+                    last_green_idx = current_idx  # Fallback: use current candle
+                self._set_mitigation(arrays, last_green_idx)
 
                 changed = True
 
-        elif self.bias == 'SHORT':
+        elif self.bias_code == self.SHORT:
             # SHORT bias changes if price CLOSES above mitigation HIGH (BREAK, not equal)
-            if candle['close'] > self.mitigation_high:
+            if close > self.mitigation_high:
                 # Bias changes to LONG
-                self.bias = 'LONG'
+                self.bias_code = self.LONG
 
                 # New mitigation = last red candle BEFORE the breaking candle (not including it)
-                last_red, last_red_idx = self.find_last_counter_candle_before_index(df, current_idx, 'red')
-
-                if last_red is not None:
-                    self.mitigation_high = last_red['high']
-                    self.mitigation_low = last_red['low']
-                    self.mitigation_candle_idx = last_red_idx
-                else:
-                    # Fallback: use current candle
-                    self.mitigation_high = candle['high']
-                    self.mitigation_low = candle['low']
-                    self.mitigation_candle_idx = current_idx
+                last_red_idx = self.last_counter_candle_idx(df, current_idx, 'red')
+                if last_red_idx < 0:
+                    last_red_idx = current_idx  # Fallback: use current candle
+                self._set_mitigation(arrays, last_red_idx)
 
                 changed = True
 
@@ -644,6 +773,21 @@ class TrendFollowingStrategy:
 
         return changed
 
+
+    def step(self, df, current_idx, swing_high=None, swing_low=None):
+        """
+        update_swing_levels + check_bias_change for one candle in a single call
+        (arrays and the hour gate are looked up once)
+
+        Returns: True if bias changed, False otherwise
+        """
+        arrays = self.candle_arrays(df)
+        if not self._in_structure_hours(arrays, current_idx):
+            return False
+
+        self._update_swing_levels(arrays, df, current_idx, swing_high, swing_low)
+        return self._check_bias_change(arrays, df, current_idx)
+
     def check_mitigation_test(self, candle):
         """
         Check if price has entered mitigation zone after bias change
@@ -657,21 +801,21 @@ class TrendFollowingStrategy:
             return
 
         # Check if price is inside mitigation zone
-        if self.bias == 'LONG':
+        if self.bias_code == self.LONG:
             # For LONG, check if price touched or entered mitigation
-            if candle['low'] <= self.mitigation_high:
+            if candle.low <= self.mitigation_high:
                 self.mitigation_tested = True
-        elif self.bias == 'SHORT':
+        elif self.bias_code == self.SHORT:
             # For SHORT, check if price touched or entered mitigation
-            if candle['high'] >= self.mitigation_low:
+            if candle.high >= self.mitigation_low:
                 self.mitigation_tested = True
 
-    def should_enter(self, candle):
+    def should_enter(self):
         """
         Check if we should enter a trade on this candle
         Entry: When bias is active and mitigation is set
         """
-        if self.bias in ['LONG', 'SHORT'] and self.mitigation_high is not None and self.mitigation_low is not None:
+        if self.bias_code != self.NONE and self.mitigation_high is not None and self.mitigation_low is not None:
             return True
         return False
 
@@ -692,143 +836,211 @@ class TrendFollowingStrategy:
             return 15  # Fallback
 
 
-    def get_entry_price(self, candle):
+    def get_entry_price(self, close):
         """Get entry price (close of the candle)"""
-        return candle['close']
+        return close
 
 
     def get_sl_price(self):
         """Get stop loss price (mitigation boundary)"""
-        if self.bias == 'LONG':
+        if self.bias_code == self.LONG:
             return self.mitigation_low
         else:
             return self.mitigation_high
 
 
-    def calculate_position_size(self, balance, entry_price, symbol):
+    def set_symbol(self, symbol):
+        """Bind the traded symbol: pip size and $ value per lot used for position sizing"""
+        self.symbol = symbol
+
+        if 'XAU' in symbol or 'GOLD' in symbol.upper():
+            # For gold: 1 lot = 100 oz, $1 move = $100 per lot
+            # SL distance is in dollars (e.g., if gold moves $10, that's $10)
+            self.pip_size = 1.0
+            self.value_per_lot = 100
+        else:
+            # Forex pairs (EURUSD, GBPUSD, etc.)
+            self.pip_size = 0.01 if 'JPY' in symbol else 0.0001
+            self.value_per_lot = 10  # Standard lot
+
+
+    def calculate_position_size(self, balance, entry_price, symbol=None):
         """
         Calculate position size based on risk
         Risk = balance * risk_per_trade (0.2% = 0.002)
         SL = mitigation boundary (max 3.5% of balance)
+
+        symbol: Rebinds the symbol if it differs from the one set via set_symbol
         """
+        if symbol is not None and symbol != self.symbol:
+            self.set_symbol(symbol)
+
         sl_price = self.get_sl_price()
 
         if sl_price is None:
             return 0
 
-        # Calculate SL distance in price
-        sl_distance = abs(entry_price - sl_price)
+        # Calculate SL distance in price (sign flip instead of an abs() call)
+        sl_distance = entry_price - sl_price
+        if sl_distance < 0:
+            sl_distance = -sl_distance
 
         if sl_distance == 0:
             return 0
 
-        # Risk amount in dollars (0.2% of balance)
-        risk_amount = balance * self.risk_per_trade
+        # SL distance in pips (gold: in dollars) and its $ value per lot
+        sl_pips = sl_distance / self.pip_size
+        value_per_lot = self.value_per_lot
+        sl_value_per_lot = sl_pips * value_per_lot
 
-        # Gold (XAU) specific calculation
-        if 'XAU' in symbol or 'GOLD' in symbol.upper():
-            # For gold: 1 lot = 100 oz, $1 move = $100 per lot
-            # SL distance is in dollars (e.g., if gold moves $10, that's $10)
-            # Dollar value per lot for $1 move = 100
-            dollar_value_per_lot = 100
-
-            # Lot size = risk / (sl_distance * dollar_value_per_lot)
-            lot_size = risk_amount / (sl_distance * dollar_value_per_lot)
-            lot_size = round(lot_size, 2)
-
-            # Check max SL
-            max_sl_amount = balance * self.max_stop_loss_percent
-            potential_loss = lot_size * sl_distance * dollar_value_per_lot
+        # Lot size based on risk (0.2% of balance); float() so round() is
+        # CPython's correctly rounded one even for NumPy scalars, as in the kernel
+        lot_size = round(float(balance * self.risk_per_trade / sl_value_per_lot), 2)
 
-            if potential_loss > max_sl_amount:
-                lot_size = max_sl_amount / (sl_distance * dollar_value_per_lot)
-                lot_size = round(lot_size, 2)
+        # Check if SL would exceed max allowed (3.5% of balance)
+        max_sl_amount = balance * self.max_stop_loss_percent
+        if lot_size * sl_pips * value_per_lot > max_sl_amount:
+            # Reduce lot size to meet max SL requirement
+            lot_size = round(float(max_sl_amount / sl_value_per_lot), 2)
 
-        # Forex pairs (EURUSD, GBPUSD, etc.)
-        else:
-            # Pip size
-            if 'JPY' in symbol:
-                pip_size = 0.01
-            else:
-                pip_size = 0.0001
-
-            pip_value_per_lot = 10  # Standard lot
-
-            # SL distance in pips
-            sl_pips = sl_distance / pip_size
+        # Minimum lot size
+        return lot_size if lot_size >= 0.01 else 0.01
 
-            # Lot size based on risk
-            lot_size = risk_amount / (sl_pips * pip_value_per_lot)
-            lot_size = round(lot_size, 2)
 
-            # Check if SL would exceed max allowed (3.5% of balance)
-            max_sl_amount = balance * self.max_stop_loss_percent
-            potential_loss = lot_size * sl_pips * pip_value_per_lot
+def generate_signals(df, strategy):
+    """
+    Generate trading signals with daily reset
 
-            if potential_loss > max_sl_amount:
-                # Reduce lot size to meet max SL requirement
-                lot_size = max_sl_amount / (sl_pips * pip_value_per_lot)
-                lot_size = round(lot_size, 2)
+    The per-candle state machine runs as one compiled kernel
+    (_backtest_loop.run_strategy) starting from a fresh strategy state;
+    the strategy is left in its final state afterwards.
 
-        # Minimum lot size
-        if lot_size < 0.01:
-            lot_size = 0.01
+    Returns:
+        DataFrame with one row per signal in emit order: index, time, type
+        (DAILY_RESET / BIAS_CHANGE / ENTRY) and the type's fields
+        (new_bias, direction, entry_price, mitigation_high, mitigation_low,
+        sl, price), NaN where a field doesn't apply
+    """
+    logger.debug("Starting signal generation over %d candles", len(df))
+
+    strategy.reset_full_state()
+    times_ns = _times_ns(df)
+    arrays = strategy.candle_arrays(df)
+
+    (sig_idx, sig_type, sig_bias, sig_mh, sig_ml), _ = _run_kernel(
+        df, strategy, strategy.trading_hours_mask(df))
+    logger.debug("Generated %d signals, final bias: %s", len(sig_idx), strategy.bias)
+
+    # Signal table from the kernel's records (NaN where a field doesn't apply)
+    close = arrays['close'][sig_idx]
+    is_reset = sig_type == SIGNAL_DAILY_RESET
+    is_change = sig_type == SIGNAL_BIAS_CHANGE
+    is_entry = sig_type == SIGNAL_ENTRY
+    is_long = sig_bias == BIAS_LONG
+    bias_names = _DIRECTION_LABELS[is_long.view(np.int8)]
+
+    return pd.DataFrame({
+        'index': sig_idx,
+        'time': pd.to_datetime(times_ns[sig_idx]),
+        'type': _SIGNAL_TYPE_LABELS[sig_type],
+        'new_bias': np.where(is_change, bias_names, np.nan),
+        'direction': np.where(is_entry, bias_names, np.nan),
+        'entry_price': np.where(is_entry, close, np.nan),
+        'mitigation_high': sig_mh,
+        'mitigation_low': sig_ml,
+        'sl': np.where(is_entry, np.where(is_long, sig_ml, sig_mh), np.nan),
+        'price': np.where(is_reset | is_change, close, np.nan),
+    })
+
+
+def strategy_state(df, strategy):
+    """
+    Per-candle strategy state for Backtester.simulate from one kernel pass
 
-        return lot_size
+    Same records as stepping the strategy candle by candle (daily reset,
+    swings, bias change, then entry during trading hours when the news and
+    ADX/ATR filters pass), starting from a fresh strategy state; the
+    strategy is left in its final state afterwards.
 
+    Returns:
+        Dict of is_long, mitigation_high, mitigation_low, can_enter, tp_pips,
+        close_code and news_event (see Backtester.simulate)
+    """
+    strategy.reset_full_state()
+    arrays = strategy.candle_arrays(df)
+
+    news_mask = None
+    if strategy.enable_news_filter and strategy.news_filter:
+        news_mask, news_name_idx, news_labels = strategy.news_filter.news_mask(df['time'])
+
+    tradable = strategy.trading_hours_mask(df, news_mask) & strategy.market_filters_mask(df)
+    (sig_idx, sig_type, _, _, _), (bias_at, mh_at, ml_at) = _run_kernel(
+        df, strategy, tradable)
+
+    # Close-all events: daily reset, else end of day, else news
+    close_code = np.zeros(len(df), dtype=np.int8)
+    end_of_day = arrays['hour'] >= strategy.trading_hours[1]
+    close_code[end_of_day] = END_OF_DAY
+    news_event = {}
+    if news_mask is not None:
+        news_only = news_mask & ~end_of_day
+        close_code[news_only] = NEWS
+        labels = np.array(news_labels, dtype=object)
+        news_event = dict(zip(np.flatnonzero(news_only).tolist(),
+                              labels[news_name_idx[news_only]].tolist()))
+    reset_idx = sig_idx[sig_type == SIGNAL_DAILY_RESET]
+    close_code[reset_idx] = DAILY_RESET
+    for i in reset_idx.tolist():
+        news_event.pop(i, None)
+
+    # Entries; nothing sets ready_to_trade, so every entry gets the first-candle TP
+    can_enter = np.zeros(len(df), dtype=np.bool_)
+    can_enter[sig_idx[sig_type == SIGNAL_ENTRY]] = True
+    tp_pips = np.full(len(df), np.nan)
+    tp_pips[can_enter] = strategy.get_tp_pips_for_entry_candle()
+
+    return {
+        'is_long': bias_at == BIAS_LONG,
+        'mitigation_high': mh_at,
+        'mitigation_low': ml_at,
+        'can_enter': can_enter,
+        'tp_pips': tp_pips,
+        'close_code': close_code,
+        'news_event': news_event,
+    }
+
+
+def _times_ns(df):
+    """Candle times as int64 epoch ns (Numba can't take Timestamps)"""
+    return df['time'].to_numpy().astype('datetime64[ns]', copy=False).view('int64')
+
+
+def _run_kernel(df, strategy, tradable):
+    """
+    Run _backtest_loop.run_strategy over df with entries allowed where
+    tradable, and load its final state into the strategy
 
-def generate_signals(df, strategy):
-    """Generate trading signals with daily reset"""
-    signals = []
-
-    print(f"Starting signal generation...")
-
-    # Process each candle
-    for i in range(0, len(df)):
-        candle = df.iloc[i]
-
-        # Check for daily reset
-        if strategy.check_daily_reset(candle['time']):
-            signals.append({
-                'index': i,
-                'time': candle['time'],
-                'type': 'DAILY_RESET',
-                'price': candle['close']
-            })
-
-        # Update swing levels
-        strategy.update_swing_levels(df, i)
-
-        # Check for bias change
-        bias_changed = strategy.check_bias_change(df, i)
-
-        if bias_changed:
-            signals.append({
-                'index': i,
-                'time': candle['time'],
-                'type': 'BIAS_CHANGE',
-                'new_bias': strategy.bias,
-                'mitigation_high': strategy.mitigation_high,
-                'mitigation_low': strategy.mitigation_low,
-                'price': candle['close']
-            })
-
-        # Check entry (only during trading hours, not analysis period)
-        if strategy.is_trading_hours(candle['time']) and strategy.should_enter(candle):
-            if strategy.mitigation_high is not None and strategy.mitigation_low is not None:
-                entry_price = strategy.get_entry_price(candle)
-
-                signal = {
-                    'index': i,
-                    'time': candle['time'],
-                    'type': 'ENTRY',
-                    'direction': strategy.bias,
-                    'entry_price': entry_price,
-                    'mitigation_high': strategy.mitigation_high,
-                    'mitigation_low': strategy.mitigation_low,
-                    'sl': strategy.get_sl_price()
-                }
-
-                signals.append(signal)
-
-    return signals
+    Returns:
+        (signal arrays, per-candle (bias, mitigation_high, mitigation_low))
+    """
+    arrays = strategy.candle_arrays(df)
+    swing_high, swing_low = strategy.swing_flags(df)
+
+    signals, final, pending, candles = run_strategy(
+        arrays['last_red_before'],
+        arrays['last_green_before'],
+        np.asarray(arrays['high'], dtype=np.float64),  # No copy when already float64
+        np.asarray(arrays['low'], dtype=np.float64),
+        np.asarray(arrays['close'], dtype=np.float64),
+        arrays['hour'],
+        arrays['day'],
+        swing_high,
+        swing_low,
+        tradable,
+        strategy.analysis_hours[0],
+        strategy.analysis_hours[1],
+        strategy.trading_hours[1],
+        strategy.swing_lookback,
+    )
+    strategy._load_kernel_state(final, pending)
+    return signals, candles